@@ -0,0 +1,97 @@
+# src/benchmark_profile.py
+import argparse
+import dataclasses
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+from dotenv import load_dotenv
+
+from src.utils.config import Config
+from src.gaiola.element_cache import ElementCache
+from src.gaiola.session import BrowserSession
+
+logger = logging.getLogger(__name__)
+
+# Load timing and resource totals of the current page, from the Navigation/Resource Timing APIs
+PAGE_METRICS_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+return {
+    load_ms: nav ? nav.loadEventEnd - nav.startTime : null,
+    resources: resources.length,
+    transfer_kb: resources.reduce((total, r) => total + (r.transferSize || 0), 0) / 1024,
+};
+"""
+
+def run_once(config: Config) -> dict:
+    """
+    Starts a browser, opens the booking page through the landing page flow and
+    returns the timings, resource totals and browser memory.
+    """
+    session = BrowserSession(config, "benchmark")
+    try:
+        started = time.monotonic()
+        session.driver = session._get_driver()
+        session.elements = ElementCache(session.driver)
+        driver_s = time.monotonic() - started
+        opened = session.open_bookings_page()
+        open_s = time.monotonic() - started - driver_s
+        metrics = session.driver.execute_script(PAGE_METRICS_SCRIPT)
+        rss_kb = session.browser_rss_kb()
+        return {
+            "ok": opened,
+            "driver_s": driver_s,
+            "open_s": open_s,
+            "load_ms": metrics["load_ms"],
+            "resources": metrics["resources"],
+            "transfer_kb": metrics["transfer_kb"],
+            "rss_mb": rss_kb / 1024 if rss_kb else None,
+        }
+    finally:
+        session.quit()
+
+def summarize(name: str, runs: list[dict]) -> None:
+    ok_runs = [r for r in runs if r["ok"]]
+    print(f"\n{name}: {len(ok_runs)}/{len(runs)} run(s) reached the booking page")
+    for key in ("driver_s", "open_s", "load_ms", "resources", "transfer_kb", "rss_mb"):
+        values = [r[key] for r in ok_runs if r[key] is not None]
+        if values:
+            print(f"  {key:12} median {statistics.median(values):10.1f}   max {max(values):10.1f}")
+        else:
+            print(f"  {key:12} n/a")
+
+def main():
+    """
+    Benchmarks the standard and the lean browser profile: browser start-up, booking
+    page open time, page load, resources, transferred data and browser RSS (local
+    browsers only). Every run goes through the landing page flow, with no saved state.
+    Usage: python3 ./src/benchmark_profile.py [--runs N]
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the standard and the lean browser profile.")
+    parser.add_argument("--runs", type=int, default=3, help="runs per profile (default: 3)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.WARNING)
+    base = Config(
+        TELE_TOKEN="", MY_ID="", EMAIL="", TEL="",
+        IS_RASPBERRY_PI=os.getenv('HEADLESS', 'False').lower() == 'true',
+        **Config.settings_from_env(),
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, lean in (("standard", False), ("lean", True)):
+            runs = []
+            for idx in range(args.runs):
+                # A fresh state file per run, so the landing page flow is always measured
+                config = dataclasses.replace(
+                    base, LEAN_PROFILE=lean, SESSION_STATE_FILE=os.path.join(tmp_dir, f"{name}-{idx}.json")
+                )
+                runs.append(run_once(config))
+            summarize(name, runs)
+
+if __name__ == "__main__":
+    main()
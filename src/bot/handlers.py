@@ -1,15 +1,15 @@
 # src/bot/handlers.py
 import logging
-import os
 from datetime import date
-from time import sleep
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CallbackContext
 
 from src.gaiola.scraper import GaiolaScraper
-from src.gaiola.models import Turno
+from src.gaiola.sweep import AvailabilitySweep, SWEEP_JOB_NAME
+from src.gaiola.models import Turno, Watch
 from src.data.people_data import all_people
-from src.utils.helpers import find_code_by_name, delete_booking_file
+from src.utils.helpers import get_booking_registry, delete_booking_record
+from src.utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -17,10 +17,9 @@ logger = logging.getLogger(__name__)
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
-    Handles the /start command. Initiates the booking process by asking for a person.
-    Only accessible by the configured MY_ID.
+    Handles the /start command. Initiates a new watch by asking for the people to book;
+    a chat can run several watches at once. Only accessible by the configured MY_ID.
     """
-    chat_id = update.effective_message.chat_id
     user_id = str(update.effective_user.id)
     user_name = update.message.from_user.name if update.message else "Unknown User"
     
@@ -33,26 +32,22 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         await update.effective_message.reply_text("Non dovresti essere qui...")
         return
 
-    # Check if a job for this chat_id already exists
-    # Note: Job names are unique. If using chat_id as name, only one job per chat is allowed.
-    # If multiple concurrent bookings for different people from the same chat are desired,
-    # job names need to be more specific (e.g., f"{chat_id}_{person_name}_{date_str}").
-    # For now, assuming one active job per chat.
-    current_jobs = context.job_queue.get_jobs_by_name(str(chat_id))
-    if current_jobs:
-        await update.effective_message.reply_text("Bot già avviato. Per avviare una nuova ricerca, prima cancella il task corrente con /deletejobs.")
-        return
-
     # Ensure scraper is on the correct page and has fresh data
-    if "booking" not in scraper.driver.current_url:
-        scraper.open_bookings_page()
-    scraper.days = scraper.get_days_list() # Refresh available days
+    await scraper.current_days() # Refresh available days
+
+    context.user_data['selected_people'] = []
+    await update.effective_message.reply_text("Seleziona le persone:", reply_markup=_people_keyboard([]))
 
+def _people_keyboard(selected_people: list) -> InlineKeyboardMarkup:
+    """
+    Builds the people keyboard, marking the selected ones, with a confirm button.
+    """
     keyboard = [
-        [InlineKeyboardButton(p.name, callback_data=f"select_person_{p.name}")] for p in all_people
+        [InlineKeyboardButton(f"✅ {p.name}" if p in selected_people else p.name, callback_data=f"select_person_{p.name}")]
+        for p in all_people
     ]
-    reply_markup = InlineKeyboardMarkup(keyboard)    
-    await update.effective_message.reply_text("Seleziona la persona:", reply_markup=reply_markup)
+    keyboard.append([InlineKeyboardButton("Conferma", callback_data="confirm_people")])
+    return InlineKeyboardMarkup(keyboard)
 
 async def show_dates(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
@@ -61,9 +56,7 @@ async def show_dates(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
     scraper: GaiolaScraper = context.bot_data['scraper']
     
     # Ensure scraper has the latest dates
-    if "booking" not in scraper.driver.current_url:
-        scraper.open_bookings_page()
-    scraper.days = scraper.get_days_list()
+    await scraper.current_days()
 
     if scraper.days:
         nl = "\n"
@@ -75,56 +68,41 @@ async def show_dates(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
 
 async def delete_jobs(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
-    Deletes all active jobs for the current chat.
+    Lets the user pick which active watch of the current chat to delete, or all of them.
     """
     chat_id = update.effective_message.chat_id
-    current_jobs = context.job_queue.get_jobs_by_name(str(chat_id)) # Get jobs specific to this chat_id
-
-    if current_jobs:
-        job_names = []
-        for job in current_jobs:
-            job_names.append(job.name)
-            job.schedule_removal()
-            logger.info(f"Deleted job: {job.name}")
-        job_names_str ='\n'.join(job_names)
-        await context.bot.send_message(chat_id, text="Rimossi i seguenti task:\n" + job_names_str)
+    sweep: AvailabilitySweep = context.bot_data['sweep']
+    watches = sweep.watches_for_chat(chat_id)
+
+    if watches:
+        keyboard = [
+            [InlineKeyboardButton(_describe_watch(w), callback_data=f"delete_watch_{w.watch_id}")] for w in watches
+        ]
+        keyboard.append([InlineKeyboardButton("Tutti", callback_data="delete_watch_all")])
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await update.effective_message.reply_text("Seleziona il task da rimuovere:", reply_markup=reply_markup)
     else:
         await context.bot.send_message(chat_id, text="Nessun task attivo da rimuovere.")
-    
-    # Also check all jobs in the queue (for debugging/overview)
-    all_jobs_in_queue = context.job_queue.jobs()
-    logger.info(f"Current jobs in queue after deletion: {[j.name for j in all_jobs_in_queue]}")
 
+def _describe_watch(watch: Watch) -> str:
+    """
+    Short description of a watch: people, dates and turni.
+    """
+    return f"{watch.people_names} - {', '.join(watch.dates)} - {'/'.join(t.value for t in watch.turni)}"
 
 async def delete_booking(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Initiates the process to delete a booking by presenting a list of saved bookings.
     """
-    bookings_dir = "bookings"
-    if not os.path.exists(bookings_dir):
-        await update.effective_message.reply_text("La cartella 'bookings' non esiste o non contiene prenotazioni.")
-        return
-
-    bookings = [f for f in os.listdir(bookings_dir) if f.endswith(".json")]
+    bookings = get_booking_registry().all()
     
     if bookings:
         keyboard = []
-        for booking_file in bookings:
-            try:
-                # Extract name from filename (e.g., "mario_rossi_CODE.json" -> "mario_rossi")
-                # Then try to map it back to a Person object for full name
-                parts = booking_file.replace(".json", "").split("_")
-                person_name_from_file = " ".join(parts[:-1]).replace("_", " ") # Reconstruct name, e.g., "mario rossi"
-                code_from_file = parts[-1]
-
-                # Find the actual Person object to display full name
-                person_obj = next((p for p in all_people if p.name.lower() == person_name_from_file.lower()), None)
-                display_name = person_obj.name if person_obj else person_name_from_file.title() # Fallback to title case
-
-                keyboard.append([InlineKeyboardButton(f"{display_name} (Code: {code_from_file})", callback_data=f"select_person_to_delete_{person_name_from_file}_{code_from_file}")])
-            except Exception as e:
-                logger.warning(f"Could not parse booking file {booking_file}: {e}")
-                keyboard.append([InlineKeyboardButton(booking_file.replace(".json", ""), callback_data=f"select_person_to_delete_error_{booking_file}")])
+        for booking in bookings:
+            display_name = ", ".join(p.name.title() for p in booking.people)
+            when = f" {booking.date}" if booking.date else ""
+
+            keyboard.append([InlineKeyboardButton(f"{display_name}{when} (Code: {booking.code})", callback_data=f"delete_booking_{booking.code}")])
 
         reply_markup = InlineKeyboardMarkup(keyboard)    
         await update.effective_message.reply_text("Seleziona la prenotazione da eliminare:", reply_markup=reply_markup)
@@ -133,23 +111,55 @@ async def delete_booking(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
 async def show_current_jobs(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
-    Shows all currently active jobs in the queue.
+    Shows the active watches of the current chat and the next run of the availability sweep.
     """
-    current_jobs = context.job_queue.jobs()
-    if current_jobs:
-        jobs_info = []
-        for job in current_jobs:
-            jobs_info.append(f"Task: {job.name} (Next run: {job.next_run_time.strftime('%H:%M:%S') if job.next_run_time else 'N/A'})")
+    chat_id = update.effective_message.chat_id
+    sweep: AvailabilitySweep = context.bot_data['sweep']
+    watches = sweep.watches_for_chat(chat_id)
+    if watches:
+        sweep_jobs = context.job_queue.get_jobs_by_name(SWEEP_JOB_NAME)
+        next_run = sweep_jobs[0].next_t if sweep_jobs else None
+        jobs_info = [f"[{w.watch_id}] {_describe_watch(w)}" for w in watches]
+        jobs_info.append(f"(Next run: {next_run.strftime('%H:%M:%S') if next_run else 'N/A'})")
         jobs_str = "\n".join(jobs_info)
-        await update.effective_message.reply_text(f"Task attivi:\n{jobs_str}")
+        await update.effective_message.reply_text(f"Task attivi ({len(watches)}):\n{jobs_str}")
     else:
         await update.effective_message.reply_text("Nessun task attivo.")
 
+async def show_budget(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Shows how much of the request budget each kind of site traffic has used.
+    """
+    scraper: GaiolaScraper = context.bot_data['scraper']
+    lines = [
+        f"{category}: {s['granted']} richieste, attesa {s['waited_s']}s, token {s['tokens']}/{s['capacity']:g}"
+        for category, s in scraper.governor.stats().items()
+    ]
+    await update.effective_message.reply_text("Budget richieste:\n" + "\n".join(lines))
+
+async def show_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Shows the p50/p95 duration of every timed stage and the event counters.
+    """
+    def ms(seconds: float | None) -> str:
+        return f"{seconds * 1000:.0f}ms" if seconds is not None else "n/a"
+
+    lines = [
+        f"{stage}: p50 {ms(s['p50'])}, p95 {ms(s['p95'])} ({s['count']})"
+        for stage, s in metrics.stage_summary().items()
+    ]
+    lines += [f"{name}: {value}" for name, value in metrics.counters().items()]
+    if lines:
+        await update.effective_message.reply_text("Statistiche:\n" + "\n".join(lines))
+    else:
+        await update.effective_message.reply_text("Nessuna statistica disponibile.")
+
 # --- Callback Query Handlers ---
 
 async def select_person(update: Update, context: CallbackContext) -> None:
     """
-    Handles the callback when a person is selected for booking.
+    Handles the callback when a person is tapped: adds them to the group to book
+    together, or removes them if already selected.
     """
     query = update.callback_query
     await query.answer()
@@ -161,16 +171,35 @@ async def select_person(update: Update, context: CallbackContext) -> None:
         await query.edit_message_text("Errore: Persona non trovata.")
         return
 
-    context.user_data['selected_person'] = selected_person
-    
+    selected_people = context.user_data.setdefault('selected_people', [])
+    if selected_person in selected_people:
+        selected_people.remove(selected_person)
+    else:
+        selected_people.append(selected_person)
+
+    await query.edit_message_reply_markup(reply_markup=_people_keyboard(selected_people))
+
+async def confirm_people(update: Update, context: CallbackContext) -> None:
+    """
+    Handles the callback when the group of people is confirmed.
+    """
+    query = update.callback_query
+
+    selected_people = context.user_data.get('selected_people')
+    if not selected_people:
+        await query.answer("Seleziona almeno una persona.")
+        return
+    await query.answer()
+
     keyboard = [
         [InlineKeyboardButton("Mattina", callback_data="select_shift_m")],
         [InlineKeyboardButton("Pomeriggio", callback_data="select_shift_p")],
         [InlineKeyboardButton("Entrambi", callback_data="select_shift_mp")]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
-    
-    await query.edit_message_text(f"Persona selezionata:\n{context.user_data['selected_person'].name}\n\nSeleziona il turno:", reply_markup=reply_markup)
+
+    names = "\n".join(p.name for p in selected_people)
+    await query.edit_message_text(f"Persone selezionate:\n{names}\n\nSeleziona il turno:", reply_markup=reply_markup)
 
 async def select_shift(update: Update, context: CallbackContext) -> None:
     """
@@ -190,9 +219,7 @@ async def select_shift(update: Update, context: CallbackContext) -> None:
     
     scraper: GaiolaScraper = context.bot_data['scraper']
     # Ensure scraper has the latest dates before presenting them
-    if "booking" not in scraper.driver.current_url:
-        scraper.open_bookings_page()
-    scraper.days = scraper.get_days_list()
+    await scraper.current_days()
 
     keyboard = [
         [InlineKeyboardButton(d.date, callback_data=f"select_date_{d.date}")] for d in scraper.days
@@ -213,45 +240,68 @@ async def select_date(update: Update, context: CallbackContext) -> None:
     selected_date = query.data.split('_')[-1]
     context.user_data['selected_date'] = selected_date
     
-    persona_richiesta = context.user_data.get('selected_person')
+    persone_richieste = context.user_data.get('selected_people')
     turno_richiesto = context.user_data.get('selected_shift')
     
-    if not persona_richiesta or not turno_richiesto:
-        await query.edit_message_text("Errore: Riprova la selezione (persona o turno mancante).")
+    if not persone_richieste or not turno_richiesto:
+        await query.edit_message_text("Errore: Riprova la selezione (persone o turno mancante).")
         return
 
     chat_id = update.effective_message.chat_id
-    scraper: GaiolaScraper = context.bot_data['scraper']
+    sweep: AvailabilitySweep = context.bot_data['sweep']
 
-    job_name = f"{update.effective_chat.username} booking for {persona_richiesta.name} on {selected_date} - {','.join([t.name for t in turno_richiesto])}"
+    names = ", ".join(p.name for p in persone_richieste)
+    job_name = f"{update.effective_chat.username} booking for {names} on {selected_date} - {','.join([t.name for t in turno_richiesto])}"
     
-    # Schedule the job to check availability
-    context.job_queue.run_repeating(
-        scraper.check_availability, # This is the method to call
-        interval=scraper.config.CHECK_INTERVAL, # Check every 30 seconds
-        first=5, # First run after 5 seconds
-        name=str(chat_id), # Use chat_id as job name for easy management (one job per chat)
+    # Subscribe the watch to the shared availability sweep: the whole group is booked in one submission
+    subscribed = sweep.subscribe(Watch(
         chat_id=chat_id,
-        data={
-            "persona_richiesta": persona_richiesta,
-            "date_richieste": [selected_date], # Pass as a list for consistency with scraper logic
-            "turno_richiesto": turno_richiesto
-        },
-        # Pass send_message_func to the job data so check_availability can use it
-        # This is a workaround as job_queue doesn't directly pass bot context to job function
-        # A better way is to bind the method to the scraper instance which has access to context.bot
-        # For simplicity, passing the function directly here.
-        # Alternatively, make check_availability a standalone function that takes scraper and context.
-        # For this refactor, I've made check_availability a method of GaiolaScraper that takes send_message_func.
-        # job_kwargs={'send_message_func': context.bot.send_message}
-    )
+        name=job_name,
+        people=list(persone_richieste),
+        dates=[selected_date],
+        turni=turno_richiesto,
+    ))
+    if not subscribed:
+        await query.edit_message_text("Questa ricerca è già attiva. Usa /showcurrentjobs per vedere i task attivi.")
+        return
     
-    text = (f"Bot avviato. Ricerca posti per {persona_richiesta.name} {persona_richiesta.surname} "
+    people_str = ", ".join(f"{p.name} {p.surname}" for p in persone_richieste)
+    text = (f"Bot avviato. Ricerca {len(persone_richieste)} posti per {people_str} "
             f"in data {selected_date} turno {' / '.join([t.value for t in turno_richiesto])}.\n"
             f"Il task si chiama: '{job_name}'")
     await query.edit_message_text(text)
 
 
+async def select_watch_to_delete(update: Update, context: CallbackContext) -> None:
+    """
+    Handles the callback when a watch (or all of them) is selected for deletion.
+    """
+    query = update.callback_query
+    await query.answer()
+
+    chat_id = update.effective_message.chat_id
+    sweep: AvailabilitySweep = context.bot_data['sweep']
+
+    # Data format: delete_watch_{watch_id} or delete_watch_all
+    watch_id = query.data[len("delete_watch_"):]
+    if watch_id == "all":
+        removed_watches = sweep.unsubscribe_chat(chat_id)
+    else:
+        watch = sweep.watch_by_id(watch_id)
+        # Only the chat's own watches can be deleted
+        removed_watches = [watch] if watch and watch.chat_id == chat_id else []
+        for watch in removed_watches:
+            sweep.unsubscribe(watch)
+
+    if removed_watches:
+        watch_names_str = '\n'.join([w.name for w in removed_watches])
+        await query.edit_message_text("Rimossi i seguenti task:\n" + watch_names_str)
+    else:
+        await query.edit_message_text("Task non trovato: potrebbe essere già stato completato o rimosso.")
+
+    # Also log all remaining watches (for debugging/overview)
+    logger.info(f"Current watches after deletion: {[w.name for w in sweep.watches]}")
+
 async def select_person_to_delete(update: Update, context: CallbackContext) -> None:
     """
     Handles the callback when a booking is selected for deletion.
@@ -259,41 +309,36 @@ async def select_person_to_delete(update: Update, context: CallbackContext) -> N
     query = update.callback_query
     await query.answer()
 
-    # Data format: select_person_to_delete_{person_name_from_file}_{code_from_file}
-    parts = query.data.split('_')
-    if len(parts) < 4: # Error case or malformed data
+    # Data format: delete_booking_{code}
+    booking_code = query.data[len("delete_booking_"):]
+    booking = get_booking_registry().get(booking_code)
+    if not booking:
         await query.edit_message_text("Errore: Dati di cancellazione non validi.")
         return
 
-    person_name_from_file = parts[3] # This is the lowercased name from the filename
-    booking_code = parts[4] # This is the code from the filename
-
-    # Find the actual Person object to get CF
-    person_list = [p for p in all_people if p.name.lower() == person_name_from_file.lower()]
+    # The booking is cancelled with its holder's CF (the first person on the form);
+    # bookings saved without it resolve it from the people list
+    holder = booking.holder
+    holder_cf = holder.cf or next((p.cf for p in all_people if p.name.lower() == holder.name.lower()), None)
 
-    if not person_list:
-        await query.edit_message_text(f"Errore: Persona '{person_name_from_file}' non trovata nella lista delle persone.")
+    if not holder_cf:
+        await query.edit_message_text(f"Errore: Persona '{holder.name}' non trovata nella lista delle persone.")
         return
-    
-    person_obj = person_list[0]
+
+    names = ", ".join(p.name for p in booking.people)
     
     scraper: GaiolaScraper = context.bot_data['scraper']
     
     try:
-        cancellation_url = f"https://booking.areamarinaprotettagaiola.it/booking/prenotazione_cancella.php?action=2&id={booking_code}&cf={person_obj.cf}"
-        logger.info(f"Attempting to cancel booking via URL: {cancellation_url}")
-        
-        scraper.driver.get(cancellation_url)
-        # Check for success message on the page if possible, or rely on file deletion
-        sleep(2) # Give time for cancellation to process
+        # Check for success message on the page if possible, or rely on the registry
+        await scraper.cancel_booking(booking_code, holder_cf)
 
-        delete_status = delete_booking_file(person_obj.name, booking_code)
+        delete_status = delete_booking_record(booking_code)
         
         if delete_status:
-            await query.edit_message_text(f"Prenotazione per {person_obj.name} (Codice: {booking_code}) cancellata con successo.")
+            await query.edit_message_text(f"Prenotazione per {names} (Codice: {booking_code}) cancellata con successo.")
         else:
-            await query.edit_message_text(f"Errore nella cancellazione della prenotazione per {person_obj.name} (Codice: {booking_code}). Il file potrebbe non essere stato trovato o eliminato.")
+            await query.edit_message_text(f"Errore nella cancellazione della prenotazione per {names} (Codice: {booking_code}). La prenotazione potrebbe non essere stata trovata o eliminata.")
     except Exception as e:
-        logger.error(f"Error during booking cancellation for {person_obj.name}: {e}")
-        await query.edit_message_text(f"Si è verificato un errore durante la cancellazione della prenotazione per {person_obj.name}: {e}")
-
+        logger.error(f"Error during booking cancellation for {names}: {e}")
+        await query.edit_message_text(f"Si è verificato un errore durante la cancellazione della prenotazione per {names}: {e}")
@@ -3,7 +3,9 @@ import logging
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
 
 from src.utils.config import Config
+from src.gaiola.lifecycle import LIFECYCLE_JOB_NAME
 from src.gaiola.scraper import GaiolaScraper
+from src.gaiola.sweep import AvailabilitySweep, SWEEP_JOB_NAME
 from src.bot import handlers # Import handlers module
 
 logger = logging.getLogger(__name__)
@@ -22,8 +24,10 @@ class TelegramBot:
         """
         self.config = config
         self.scraper = scraper
-        self.application = Application.builder().token(self.config.TELE_TOKEN).build()
+        self.sweep = AvailabilitySweep(scraper)
+        self.application = Application.builder().token(self.config.TELE_TOKEN).post_shutdown(self._on_shutdown).build()
         self._add_handlers()
+        self._schedule_sweep()
 
     def _add_handlers(self):
         """
@@ -32,6 +36,7 @@ class TelegramBot:
         """
         self.application.bot_data['scraper'] = self.scraper
         self.application.bot_data['config'] = self.config
+        self.application.bot_data['sweep'] = self.sweep
 
         # Command Handlers
         self.application.add_handler(CommandHandler("start", handlers.start))
@@ -39,15 +44,76 @@ class TelegramBot:
         self.application.add_handler(CommandHandler("deletejobs", handlers.delete_jobs))
         self.application.add_handler(CommandHandler("showcurrentjobs", handlers.show_current_jobs))
         self.application.add_handler(CommandHandler("deletebooking", handlers.delete_booking))
+        self.application.add_handler(CommandHandler("budget", handlers.show_budget))
+        self.application.add_handler(CommandHandler("stats", handlers.show_stats))
 
         # Callback Query Handlers
         self.application.add_handler(CallbackQueryHandler(handlers.select_person, pattern="^select_person_"))
+        self.application.add_handler(CallbackQueryHandler(handlers.confirm_people, pattern="^confirm_people$"))
         self.application.add_handler(CallbackQueryHandler(handlers.select_shift, pattern="^select_shift_"))
         self.application.add_handler(CallbackQueryHandler(handlers.select_date, pattern="^select_date_"))
-        self.application.add_handler(CallbackQueryHandler(handlers.select_person_to_delete, pattern="^select_person_to_delete_"))
+        self.application.add_handler(CallbackQueryHandler(handlers.select_person_to_delete, pattern="^delete_booking_"))
+        self.application.add_handler(CallbackQueryHandler(handlers.select_watch_to_delete, pattern="^delete_watch_"))
         
         logger.info("All Telegram handlers added.")
 
+    def _schedule_sweep(self):
+        """
+        Schedules the single repeating job that checks availability for all watches.
+        """
+        self.application.job_queue.run_repeating(
+            self.sweep.tick,
+            interval=self.sweep.tick_interval,
+            first=5, # First run after 5 seconds
+            name=SWEEP_JOB_NAME,
+        )
+        logger.info(f"Availability sweep scheduled every {self.sweep.tick_interval} seconds.")
+        self.application.job_queue.run_repeating(
+            self._maintain_drivers,
+            interval=self.config.DRIVER_CHECK_INTERVAL,
+            first=self.config.DRIVER_CHECK_INTERVAL,
+            name=LIFECYCLE_JOB_NAME,
+        )
+
+    def restore_watches(self) -> None:
+        """
+        Restores the watches persisted by a previous run, before polling starts. With
+        Config.PREARMED_BOOKING their booking sessions are started
+        Config.WATCH_RESTORE_STAGGER seconds apart, so a restart does not open a browser
+        and load the booking page for every watch at once.
+        """
+        restored = self.sweep.restore()
+        if not self.sweep.prearm:
+            return
+        for idx, watch in enumerate(restored):
+            self.application.job_queue.run_once(
+                self._arm_restored,
+                when=self.config.WATCH_RESTORE_STAGGER * (idx + 1),
+                data=watch,
+                name=f"arm_{watch.watch_id}",
+            )
+
+    async def _arm_restored(self, context: ContextTypes.DEFAULT_TYPE) -> None:
+        watch = context.job.data
+        # Skip the watches cancelled or booked before their turn came
+        if watch in self.sweep.registry:
+            await self.scraper.armory.arm(watch)
+
+    async def _maintain_drivers(self, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """
+        Recycles the browser sessions past their lifecycle limits. Pooled sessions are
+        swapped in the background; the observer and armed sessions are swapped in this
+        job, one after the other.
+        """
+        await self.scraper.maintain_drivers()
+
+    async def _on_shutdown(self, application: Application) -> None:
+        """
+        Releases the scraper's browser and probe once the bot has stopped.
+        """
+        logger.info("Telegram bot stopped, closing scraper...")
+        await self.scraper.close()
+
     def run(self) -> None:
         """
         Starts the Telegram bot polling for updates.
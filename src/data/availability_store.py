@@ -0,0 +1,183 @@
+# src/data/availability_store.py
+import logging
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterator
+
+from src.gaiola.models import Turno
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of readings written in one transaction
+BATCH_SIZE = 500
+# Seconds the writer waits for more readings before committing a partial batch
+FLUSH_INTERVAL = 2.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS readings (
+    ts INTEGER NOT NULL,     -- Unix timestamp of the reading
+    date TEXT NOT NULL,      -- Watched date, YYYY-mm-dd
+    turno TEXT NOT NULL,     -- Turno name (MATTINO / POMERIGGIO)
+    count INTEGER NOT NULL   -- Available spots
+);
+CREATE INDEX IF NOT EXISTS readings_date_ts ON readings (date, ts);
+CREATE INDEX IF NOT EXISTS readings_ts ON readings (ts);
+"""
+
+@dataclass
+class Reading:
+    """
+    Dataclass to represent one availability reading.
+    """
+    ts: datetime
+    date: str # dd/mm/YYYY, as shown on the booking page
+    turno: Turno
+    count: int
+
+def _to_iso(date_str: str) -> str:
+    return datetime.strptime(date_str, "%d/%m/%Y").strftime("%Y-%m-%d")
+
+def _from_row(row: tuple) -> Reading:
+    ts, date_iso, turno, count = row
+    return Reading(
+        ts=datetime.fromtimestamp(ts),
+        date=datetime.strptime(date_iso, "%Y-%m-%d").strftime("%d/%m/%Y"),
+        turno=Turno[turno],
+        count=count,
+    )
+
+class AvailabilityStore:
+    """
+    Append-only SQLite (WAL mode) store of every availability reading.
+    Readings are queued and written in batches by a background thread, so
+    recording never blocks the poll path; queries use their own connection.
+    """
+    def __init__(self, path: str):
+        """
+        Opens (or creates) the store and starts the writer thread.
+        Args:
+            path (str): Path of the SQLite database file.
+        """
+        self.path = path
+        self._queue: queue.Queue = queue.Queue()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        self._writer = threading.Thread(target=self._write_loop, name="availability-store", daemon=True)
+        self._writer.start()
+        logger.info(f"Availability store opened at {path}")
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Opens a connection for one transaction: committed (or rolled back) and closed on exit.
+        """
+        conn = self._open()
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, date_str: str, turno: Turno, count: int, ts: datetime | None = None) -> None:
+        """
+        Queues a reading for writing. Never blocks.
+        Args:
+            date_str (str): The date read (dd/mm/YYYY).
+            turno (Turno): The turno read.
+            count (int): The available spots.
+            ts (datetime | None): When the reading was taken, now if not given.
+        """
+        ts = ts or datetime.now()
+        self._queue.put((int(ts.timestamp()), _to_iso(date_str), turno.name, count))
+
+    def _write_loop(self) -> None:
+        # The writer keeps one connection for its whole life
+        conn = self._open()
+        closing = False
+        while not closing:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < BATCH_SIZE:
+                    batch.append(self._queue.get(timeout=FLUSH_INTERVAL))
+            except queue.Empty:
+                pass
+            if None in batch:
+                closing = True
+            rows = [r for r in batch if r is not None]
+            try:
+                if rows:
+                    with conn:
+                        conn.executemany("INSERT INTO readings (ts, date, turno, count) VALUES (?, ?, ?, ?)", rows)
+            except sqlite3.Error as e:
+                logger.error(f"Error writing {len(rows)} readings to the availability store: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        conn.close()
+
+    def flush(self) -> None:
+        """
+        Waits until every queued reading has been written.
+        """
+        self._queue.join()
+
+    def history(self, date_str: str) -> list[Reading]:
+        """
+        Returns every reading of a date, oldest first.
+        Args:
+            date_str (str): The date (dd/mm/YYYY).
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT ts, date, turno, count FROM readings WHERE date = ? ORDER BY ts", (_to_iso(date_str),)
+            ).fetchall()
+        return [_from_row(r) for r in rows]
+
+    def latest(self) -> dict[tuple[str, Turno], int]:
+        """
+        Returns the most recent count of every (date, turno) ever read.
+        """
+        with self._connect() as conn:
+            # The store is append-only, so the highest rowid is the latest reading even within one second
+            rows = conn.execute(
+                "SELECT ts, date, turno, count FROM readings "
+                "WHERE rowid IN (SELECT MAX(rowid) FROM readings GROUP BY date, turno)"
+            ).fetchall()
+        return {(r.date, r.turno): r.count for r in map(_from_row, rows)}
+
+    def transitions(self, days: int) -> list[Reading]:
+        """
+        Returns every 0→N transition observed in the last `days` days, oldest first.
+        Each returned reading is the first one with availability after a full turno.
+        """
+        since = int((datetime.now() - timedelta(days=days)).timestamp())
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT ts, date, turno, count FROM (
+                    SELECT ts, date, turno, count,
+                           LAG(count) OVER (PARTITION BY date, turno ORDER BY ts) AS prev_count
+                    FROM readings WHERE ts >= ?
+                ) WHERE prev_count = 0 AND count > 0
+                ORDER BY ts
+                """,
+                (since,),
+            ).fetchall()
+        return [_from_row(r) for r in rows]
+
+    def close(self) -> None:
+        """
+        Writes the pending readings and stops the writer thread.
+        """
+        self._queue.put(None)
+        self._writer.join(timeout=10)
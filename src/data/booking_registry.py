@@ -0,0 +1,222 @@
+# src/data/booking_registry.py
+import json
+import logging
+import os
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bookings (
+    code TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    date TEXT,            -- dd/mm/YYYY, unknown for imported legacy bookings
+    turno TEXT,           -- Turno name, unknown for imported legacy bookings
+    created_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bookings_name ON bookings (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS bookings_date_turno ON bookings (date, turno);
+CREATE TABLE IF NOT EXISTS booking_people (
+    code TEXT NOT NULL,
+    position INTEGER NOT NULL,  -- Order on the booking form, 0 is the holder
+    name TEXT NOT NULL,
+    cf TEXT,                    -- Codice fiscale, unknown for older bookings
+    PRIMARY KEY (code, position)
+);
+CREATE INDEX IF NOT EXISTS booking_people_name ON booking_people (name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS imported_files (
+    filename TEXT PRIMARY KEY
+);
+"""
+
+@dataclass
+class BookedPerson:
+    """
+    Dataclass to represent one of the people a booking is for.
+    """
+    name: str
+    cf: str | None = None
+
+@dataclass
+class Booking:
+    """
+    Dataclass to represent a saved booking. A group booking has one code for all its
+    people, the first of whom (the holder) is the one it is cancelled with.
+    """
+    code: str
+    name: str
+    date: str | None = None
+    turno: str | None = None
+    created_at: datetime | None = None
+    people: list[BookedPerson] = field(default_factory=list)
+
+    @property
+    def holder(self) -> BookedPerson:
+        return self.people[0] if self.people else BookedPerson(self.name)
+
+class BookingRegistry:
+    """
+    Indexed store of the bookings made by the bot, backed by SQLite.
+    Reads are served from an in-memory index (by code, person, date and turno)
+    that is rebuilt lazily after every write. Every person of a group booking is
+    indexed, so the booking is found by any of their names.
+    """
+    def __init__(self, path: str):
+        """
+        Opens (or creates) the registry.
+        Args:
+            path (str): Path of the SQLite database file.
+        """
+        self.path = path
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+        self._by_code: dict[str, Booking] | None = None
+        self._by_name: dict[str, list[Booking]] = {}
+        self._by_date: dict[tuple[str | None, str | None], list[Booking]] = {}
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Opens a connection for one transaction: committed (or rolled back) and closed on exit.
+        """
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _index(self) -> dict[str, Booking]:
+        """
+        Returns the in-memory index, loading it from the database if it was invalidated.
+        """
+        if self._by_code is None:
+            with self._connect() as conn:
+                rows = conn.execute("SELECT code, name, date, turno, created_at FROM bookings ORDER BY created_at").fetchall()
+                people_rows = conn.execute("SELECT code, name, cf FROM booking_people ORDER BY code, position").fetchall()
+            people: dict[str, list[BookedPerson]] = {}
+            for code, name, cf in people_rows:
+                people.setdefault(code, []).append(BookedPerson(name, cf))
+            self._by_code, self._by_name, self._by_date = {}, {}, {}
+            for code, name, date_str, turno, created_at in rows:
+                # Bookings saved before people were recorded are for the single person they are named after
+                booking = Booking(code, name, date_str, turno, datetime.fromtimestamp(created_at), people.get(code, [BookedPerson(name)]))
+                self._by_code[code] = booking
+                for person in booking.people:
+                    self._by_name.setdefault(person.name.lower(), []).append(booking)
+                self._by_date.setdefault((date_str, turno), []).append(booking)
+        return self._by_code
+
+    def _invalidate(self) -> None:
+        self._by_code = None
+
+    def add(self, name: str, code: str, date_str: str | None = None, turno: str | None = None,
+            people: list[BookedPerson] | None = None) -> Booking:
+        """
+        Saves a booking, replacing any previous booking with the same code.
+        Args:
+            name (str): The name the booking is listed under.
+            code (str): The booking code.
+            date_str (str | None): The booked date (dd/mm/YYYY).
+            turno (str | None): The booked turno name.
+            people (list[BookedPerson] | None): The people booked, holder first; just `name` if not given.
+        Returns:
+            Booking: The saved booking.
+        """
+        created_at = datetime.now()
+        people = people or [BookedPerson(name)]
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO bookings (code, name, date, turno, created_at) VALUES (?, ?, ?, ?, ?)",
+                (code, name, date_str, turno, int(created_at.timestamp())),
+            )
+            conn.execute("DELETE FROM booking_people WHERE code = ?", (code,))
+            conn.executemany(
+                "INSERT INTO booking_people (code, position, name, cf) VALUES (?, ?, ?, ?)",
+                [(code, idx, p.name, p.cf) for idx, p in enumerate(people)],
+            )
+        self._invalidate()
+        logger.info(f"Booking {code} for {name} saved to registry.")
+        return Booking(code, name, date_str, turno, created_at, people)
+
+    def remove(self, code: str) -> bool:
+        """
+        Removes a booking by code.
+        Returns:
+            bool: True if a booking was removed.
+        """
+        with self._connect() as conn:
+            removed = conn.execute("DELETE FROM bookings WHERE code = ?", (code,)).rowcount
+            conn.execute("DELETE FROM booking_people WHERE code = ?", (code,))
+        self._invalidate()
+        return removed > 0
+
+    def get(self, code: str) -> Booking | None:
+        """
+        Returns the booking with the given code, if any.
+        """
+        return self._index().get(code)
+
+    def find_by_name(self, name: str) -> list[Booking]:
+        """
+        Returns the bookings of a person (case-insensitive), group bookings included, oldest first.
+        """
+        self._index()
+        return list(self._by_name.get(name.lower(), []))
+
+    def find_by_date(self, date_str: str, turno: str | None = None) -> list[Booking]:
+        """
+        Returns the bookings for a date, optionally restricted to one turno.
+        """
+        self._index()
+        if turno:
+            return list(self._by_date.get((date_str, turno), []))
+        return [b for (d, _), bookings in self._by_date.items() if d == date_str for b in bookings]
+
+    def all(self) -> list[Booking]:
+        """
+        Returns every booking, oldest first.
+        """
+        return list(self._index().values())
+
+    def import_json_dir(self, directory: str) -> int:
+        """
+        Imports legacy `{name, code}` JSON booking files. Each file is imported only once,
+        so a booking deleted from the registry is not brought back by its old file.
+        Args:
+            directory (str): Directory holding the *.json booking files.
+        Returns:
+            int: The number of imported bookings.
+        """
+        if not os.path.isdir(directory):
+            return 0
+        with self._connect() as conn:
+            already_imported = {r[0] for r in conn.execute("SELECT filename FROM imported_files")}
+        rows = []
+        filenames = []
+        for filename in os.listdir(directory):
+            if not filename.endswith(".json") or filename in already_imported:
+                continue
+            filepath = os.path.join(directory, filename)
+            try:
+                with open(filepath, 'r') as json_file:
+                    data = json.load(json_file)
+                rows.append((data["code"], data["name"], None, None, int(os.path.getmtime(filepath))))
+                filenames.append((filename,))
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Could not import booking file {filepath}: {e}")
+        if not rows:
+            return 0
+        with self._connect() as conn:
+            imported = conn.executemany(
+                "INSERT OR IGNORE INTO bookings (code, name, date, turno, created_at) VALUES (?, ?, ?, ?, ?)", rows
+            ).rowcount
+            conn.executemany("INSERT OR IGNORE INTO imported_files (filename) VALUES (?)", filenames)
+        self._invalidate()
+        if imported:
+            logger.info(f"Imported {imported} legacy booking file(s) from {directory}.")
+        return imported
@@ -0,0 +1,104 @@
+# src/data/watch_store.py
+import json
+import logging
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator
+
+from src.data.people_data import all_people
+from src.gaiola.models import Turno, Watch
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS watches (
+    watch_id TEXT PRIMARY KEY,
+    chat_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    people TEXT NOT NULL,      -- JSON list of codici fiscali
+    dates TEXT NOT NULL,       -- JSON list of dd/mm/YYYY dates
+    turni TEXT NOT NULL,       -- JSON list of Turno names
+    created_at INTEGER NOT NULL
+);
+"""
+
+class WatchStore:
+    """
+    SQLite store of the active watches, so they survive restarts. People are stored
+    by codice fiscale and resolved against the people list when loading.
+    """
+    def __init__(self, path: str):
+        """
+        Opens (or creates) the store.
+        Args:
+            path (str): Path of the SQLite database file.
+        """
+        self.path = path
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Opens a connection for one transaction: committed (or rolled back) and closed on exit.
+        """
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, watch: Watch) -> None:
+        """
+        Saves a watch, replacing any stored watch with the same identity.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO watches (watch_id, chat_id, name, people, dates, turni, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    watch.watch_id, watch.chat_id, watch.name,
+                    json.dumps([p.cf for p in watch.people]),
+                    json.dumps(watch.dates),
+                    json.dumps([t.name for t in watch.turni]),
+                    int(datetime.now().timestamp()),
+                ),
+            )
+
+    def remove(self, watch: Watch) -> bool:
+        """
+        Removes a watch.
+        Returns:
+            bool: True if a watch was removed.
+        """
+        with self._connect() as conn:
+            removed = conn.execute("DELETE FROM watches WHERE watch_id = ?", (watch.watch_id,)).rowcount
+        return removed > 0
+
+    def all(self) -> list[Watch]:
+        """
+        Returns every stored watch, oldest first. Watches that cannot be rebuilt
+        (a person no longer in the people list, an unknown turno) are dropped.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT watch_id, chat_id, name, people, dates, turni FROM watches ORDER BY created_at"
+            ).fetchall()
+        people_by_cf = {p.cf: p for p in all_people}
+        watches = []
+        for watch_id, chat_id, name, people, dates, turni in rows:
+            try:
+                watches.append(Watch(
+                    chat_id=chat_id,
+                    name=name,
+                    people=[people_by_cf[cf] for cf in json.loads(people)],
+                    dates=json.loads(dates),
+                    turni=[Turno[t] for t in json.loads(turni)],
+                ))
+            except (KeyError, ValueError) as e:
+                logger.warning(f"Dropping stored watch {watch_id} ({name}): {e}")
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM watches WHERE watch_id = ?", (watch_id,))
+        return watches
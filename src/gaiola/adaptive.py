@@ -0,0 +1,139 @@
+# src/gaiola/adaptive.py
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from src.gaiola.models import Turno, Watch
+from src.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# How far back observed releases are taken into account
+STATS_WINDOW_DAYS = 60
+# Buckets of "days ahead of the watched date" releases are grouped by
+DAYS_AHEAD_BUCKETS = [(0, 0), (1, 1), (2, 3), (4, 365)]
+
+@dataclass
+class ReleaseEvent:
+    """
+    Dataclass to represent an observed 0→N availability transition.
+    """
+    date: str # Watched date (dd/mm/YYYY)
+    turno: Turno
+    observed_at: datetime
+    count: int = 1
+
+    @property
+    def days_ahead(self) -> int:
+        """Days between the observation and the watched date."""
+        return (datetime.strptime(self.date, "%d/%m/%Y").date() - self.observed_at.date()).days
+
+def days_ahead_bucket(days_ahead: int) -> int:
+    """
+    Returns the index of the DAYS_AHEAD_BUCKETS bucket the given value falls in.
+    """
+    for idx, (low, high) in enumerate(DAYS_AHEAD_BUCKETS):
+        if low <= days_ahead <= high:
+            return idx
+    return len(DAYS_AHEAD_BUCKETS) - 1
+
+class ReleaseStats:
+    """
+    Keeps the observed spot releases and tells how "hot" a time window is,
+    i.e. how likely releases are compared to an average window.
+    """
+    def __init__(self, events: list[ReleaseEvent] | None = None):
+        """
+        Args:
+            events (list[ReleaseEvent] | None): Previously observed releases, e.g. loaded from the availability store.
+        """
+        self.events: list[ReleaseEvent] = events or []
+
+    def record(self, event: ReleaseEvent) -> None:
+        """
+        Records an observed release and drops the ones older than the stats window.
+        """
+        self.events.append(event)
+        cutoff = event.observed_at - timedelta(days=STATS_WINDOW_DAYS)
+        self.events = [e for e in self.events if e.observed_at >= cutoff]
+        logger.info(f"Recorded release on {event.date} {event.turno.value} "
+                    f"({event.days_ahead} days ahead, at {event.observed_at.strftime('%H:%M')})")
+
+    def heat(self, turno: Turno, days_ahead: int, now: datetime) -> float:
+        """
+        Ratio between the releases seen in the window around `now` (same turno,
+        same days-ahead bucket, hour of day ±1) and those of an average window.
+        Smoothed so that no data gives 1.0.
+        """
+        bucket = days_ahead_bucket(days_ahead)
+        relevant = [e for e in self.events if e.turno == turno and days_ahead_bucket(e.days_ahead) == bucket]
+        if not relevant:
+            return 1.0
+        in_window = sum(1 for e in relevant if min(abs(e.observed_at.hour - now.hour), 24 - abs(e.observed_at.hour - now.hour)) <= 1)
+        # Three hours out of 24 are covered by the window
+        expected = len(relevant) * 3 / 24
+        return (in_window + 1) / (expected + 1)
+
+class AdaptiveScheduler:
+    """
+    Decides which watched dates are due for a check on each sweep tick.
+    Each date gets its own polling interval, derived from the release statistics
+    of the turni watched on it: short in historically hot windows, long in cold ones,
+    always within Config.POLL_MIN_INTERVAL / POLL_MAX_INTERVAL and scaled so that the
+    total rate stays within Config.POLL_BUDGET_PER_HOUR date reads.
+    """
+    def __init__(self, config: Config, stats: ReleaseStats | None = None):
+        """
+        Args:
+            config (Config): The application configuration object.
+            stats (ReleaseStats | None): Release statistics, a new empty one if not given.
+        """
+        self.base_interval = config.CHECK_INTERVAL
+        self.min_interval = config.POLL_MIN_INTERVAL
+        self.max_interval = config.POLL_MAX_INTERVAL
+        self.budget_per_hour = config.POLL_BUDGET_PER_HOUR
+        self.stats = stats or ReleaseStats()
+        self.next_due: dict[str, datetime] = {}
+
+    def _date_interval(self, date_str: str, turni: set[Turno], now: datetime) -> float:
+        days_ahead = (datetime.strptime(date_str, "%d/%m/%Y").date() - now.date()).days
+        heat = max(self.stats.heat(t, days_ahead, now) for t in turni)
+        return min(max(self.base_interval / heat, self.min_interval), self.max_interval)
+
+    def intervals(self, watches: list[Watch], now: datetime) -> dict[str, float]:
+        """
+        Returns the polling interval, in seconds, of every watched date.
+        """
+        turni_by_date: dict[str, set[Turno]] = {}
+        for watch in watches:
+            for date_str in watch.dates:
+                turni_by_date.setdefault(date_str, set()).update(watch.turni)
+        intervals = {d: self._date_interval(d, turni, now) for d, turni in turni_by_date.items()}
+
+        # Scale every interval up if the total rate would exceed the request budget
+        reads_per_hour = sum(3600 / i for i in intervals.values())
+        if reads_per_hour > self.budget_per_hour:
+            factor = reads_per_hour / self.budget_per_hour
+            intervals = {d: min(i * factor, self.max_interval) for d, i in intervals.items()}
+        return intervals
+
+    def due_dates(self, watches: list[Watch], now: datetime) -> set[str]:
+        """
+        Returns the watched dates due for a check and schedules their next one.
+        """
+        due = set()
+        for date_str, interval in self.intervals(watches, now).items():
+            if self.next_due.get(date_str, now) <= now:
+                due.add(date_str)
+                self.next_due[date_str] = now + timedelta(seconds=interval)
+        # Forget dates nobody watches anymore
+        watched = {d for w in watches for d in w.dates}
+        self.next_due = {d: t for d, t in self.next_due.items() if d in watched}
+        return due
+
+    def record_release(self, date_str: str, turno: Turno, count: int, now: datetime) -> None:
+        """
+        Records an observed 0→N transition and makes its date due right away.
+        """
+        self.stats.record(ReleaseEvent(date_str, turno, now, count))
+        self.next_due[date_str] = now
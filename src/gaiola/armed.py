@@ -0,0 +1,183 @@
+# src/gaiola/armed.py
+import asyncio
+import logging
+import time
+
+from src.gaiola.governor import RequestCategory, RequestGovernor
+from src.gaiola.lifecycle import DriverLifecycle
+from src.gaiola.models import Turno, Watch, WatchKey
+from src.gaiola.session import BrowserSession
+from src.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+class ArmedBooking:
+    """
+    A browser session dedicated to one watch, with the booking for its first date and
+    turno already staged: date and turno selected and, if the site allows it, the
+    form filled in. Firing it only leaves the final submit to do.
+    """
+    def __init__(self, watch: Watch, session: BrowserSession):
+        self.watch = watch
+        self.session = session
+        self.date_str = watch.dates[0]
+        self.turno = watch.turni[0]
+        self.form_ready = False
+        self.staged_at: float | None = None
+        # Held while staging or firing, so the two never overlap
+        self.lock = asyncio.Lock()
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether the session has started and a booking is staged on it, i.e. whether
+        firing it beats leasing a pooled session.
+        """
+        return self.session.started_at is not None and self.staged_at is not None
+
+class BookingArmory:
+    """
+    Keeps an ArmedBooking per active watch when Config.PREARMED_BOOKING is on, so a
+    freed spot is booked without leasing a session, loading the page or filling the
+    form after detection. Staged bookings are refreshed every
+    Config.PREARM_REFRESH_MINUTES and their sessions follow the DriverLifecycle limits.
+    """
+    def __init__(self, config: Config, governor: RequestGovernor):
+        """
+        Args:
+            config (Config): The application configuration object.
+            governor (RequestGovernor): The governor page loads go through.
+        """
+        self.config = config
+        self.governor = governor
+        self.refresh_after = config.PREARM_REFRESH_MINUTES * 60
+        self.armed: dict[WatchKey, ArmedBooking] = {}
+
+    def get(self, watch: Watch) -> ArmedBooking | None:
+        """
+        Returns the armed booking of a watch, if it is armed and ready to fire: not while
+        its session is starting, being replaced, or left on a confirmation page.
+        """
+        armed = self.armed.get(watch.key)
+        return armed if armed and armed.ready else None
+
+    async def arm(self, watch: Watch) -> None:
+        """
+        Starts a dedicated session for a watch and stages its booking.
+        """
+        key = watch.key
+        if key in self.armed:
+            return
+        session = BrowserSession(self.config, f"armed-{watch.watch_id}")
+        armed = ArmedBooking(watch, session)
+        self.armed[key] = armed
+        await self.governor.acquire(RequestCategory.REFRESH)
+        try:
+            started = await session.run(session.start)
+        except Exception as e:
+            logger.error(f"Could not start the armed session of {watch.name}: {e}")
+            started = False
+        if not started or self.armed.get(key) is not armed:
+            # Failed, or disarmed while starting
+            if self.armed.get(key) is armed:
+                del self.armed[key]
+            await self._close(armed)
+            return
+        await self._stage(armed, reload=False)
+
+    async def _stage(self, armed: ArmedBooking, reload: bool = True) -> None:
+        """
+        Stages the booking of an armed session, on a freshly loaded booking page unless
+        `reload` is False (the session just opened it).
+        """
+        async with armed.lock:
+            session = armed.session
+            try:
+                if reload:
+                    await self.governor.acquire(RequestCategory.REFRESH)
+                    if await session.run(session.is_on_booking_page):
+                        await session.run(session.reload)
+                    else:
+                        await session.run(session.open_bookings_page)
+                armed.form_ready = await session.run(
+                    session.stage_booking, armed.date_str, armed.turno,
+                    armed.watch.people, self.config.EMAIL, self.config.TEL,
+                )
+            except Exception as e:
+                logger.warning(f"Could not stage the booking of {armed.watch.name}: {e}")
+                armed.form_ready = False
+            armed.staged_at = time.monotonic()
+        logger.info(f"Armed booking for {armed.watch.name} on {armed.date_str} {armed.turno.value} "
+                    f"(form {'filled' if armed.form_ready else 'not open yet'}).")
+
+    async def fire(self, armed: ArmedBooking, date_str: str, turno: Turno) -> bool:
+        """
+        Submits an armed booking for the given date and turno. It is staged again first
+        if the freed spot is not the one it was staged for, or if the form was not open
+        yet (the turno was full when staging).
+        Returns:
+            bool: False if the armed booking was disarmed or unstaged while waiting for
+                its lock, or if staging or submitting failed; nothing was submitted and
+                the caller should book another way.
+        """
+        async with armed.lock:
+            if self.armed.get(armed.watch.key) is not armed or not armed.ready:
+                return False
+            session = armed.session
+            form_ready = armed.form_ready
+            try:
+                if (date_str, turno) != (armed.date_str, armed.turno) or not form_ready:
+                    armed.date_str, armed.turno = date_str, turno
+                    form_ready = await session.run(
+                        session.stage_booking, date_str, turno, armed.watch.people, self.config.EMAIL, self.config.TEL
+                    )
+                await session.run(session.submit_staged_booking, form_ready, armed.watch.people, self.config.EMAIL, self.config.TEL)
+            except Exception as e:
+                # The confirmation click is the last step of the submit, so a failure means it was not sent
+                logger.error(f"Could not fire the armed booking of {armed.watch.name}: {e}")
+                return False
+            finally:
+                # Left on the confirmation page or broken: re-staged by the next maintain() if the watch goes on,
+                # and never fired again before that
+                armed.form_ready = False
+                armed.staged_at = None
+            return True
+
+    async def disarm(self, watch: Watch) -> None:
+        """
+        Quits the dedicated session of a watch, if any.
+        """
+        armed = self.armed.pop(watch.key, None)
+        if armed:
+            async with armed.lock:
+                await self._close(armed)
+            logger.info(f"Disarmed booking for {watch.name}.")
+
+    async def maintain(self, lifecycle: DriverLifecycle) -> None:
+        """
+        Re-stages the bookings staged too long ago (the site may have expired the form)
+        and restarts the sessions that reached a lifecycle limit.
+        """
+        for armed in list(self.armed.values()):
+            if armed.lock.locked() or armed.session.started_at is None:
+                # Busy, or still starting
+                continue
+            reason = lifecycle.recycle_reason(armed.session)
+            if reason:
+                logger.info(f"Recycling the armed session of {armed.watch.name} ({reason}).")
+                await self.disarm(armed.watch)
+                await self.arm(armed.watch)
+            elif armed.staged_at is None or time.monotonic() - armed.staged_at > self.refresh_after:
+                await self._stage(armed)
+
+    @staticmethod
+    async def _close(armed: ArmedBooking) -> None:
+        await armed.session.run(armed.session.quit)
+        armed.session.executor.shutdown(wait=False)
+
+    async def close(self) -> None:
+        """
+        Quits every armed session.
+        """
+        for armed in list(self.armed.values()):
+            await self.disarm(armed.watch)
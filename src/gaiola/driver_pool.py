@@ -0,0 +1,325 @@
+# src/gaiola/driver_pool.py
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import AsyncIterator
+
+from src.gaiola.governor import RequestCategory, RequestGovernor
+from src.gaiola.lifecycle import DriverLifecycle
+from src.gaiola.recovery import SessionRecovery
+from src.gaiola.session import BrowserSession
+from src.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait before retrying when a replacement browser cannot be started
+RESTART_RETRY_DELAY = 30
+
+class LeaseTimeout(Exception):
+    """
+    Raised when no pooled session became idle within the lease timeout.
+    """
+
+class DriverPool:
+    """
+    Pool of BrowserSessions parked on the booking page, handed out with lease/return semantics.
+    Sessions are health-checked when returned, and recycled after Config.DRIVER_MAX_USES
+    leases or when maintain() finds them past a DriverLifecycle limit: a replacement is
+    warmed on the booking page first, and the old session is only quit once idle. A session that failed during its lease or drifted off the booking page goes
+    through SessionRecovery first, and is only replaced when that fails. Each session uses webdriver.Remote
+    against the Selenium grid when running on the Raspberry Pi, like a single driver would.
+    With Config.DRIVER_HOT_SPARE an extra warmed session is parked on the booking page,
+    ready to take over polling the moment a session is handed to a booking.
+    Page reloads and re-opens go through the request governor as refresh traffic.
+    """
+    def __init__(self, config: Config, governor: RequestGovernor, recovery: SessionRecovery):
+        """
+        Initializes an empty pool; sessions are created by start().
+        Args:
+            config (Config): The application configuration object.
+            governor (RequestGovernor): The governor page loads go through.
+            recovery (SessionRecovery): Recovery run on failed sessions before replacing them.
+        """
+        self.config = config
+        self.governor = governor
+        self.recovery = recovery
+        self.size = config.DRIVER_POOL_SIZE
+        self.max_uses = config.DRIVER_MAX_USES
+        self.hot_spare = config.DRIVER_HOT_SPARE
+        self.sessions: list[BrowserSession] = []
+        self.spare: BrowserSession | None = None
+        self._idle: asyncio.Queue[BrowserSession] = asyncio.Queue()
+        self._counter = 0
+        self._background: set[asyncio.Task] = set()
+        self._recycling: set[BrowserSession] = set()
+
+    def _new_session(self) -> BrowserSession:
+        self._counter += 1
+        return BrowserSession(self.config, f"session-{self._counter}")
+
+    def start(self) -> None:
+        """
+        Creates all sessions (and the hot spare, if enabled) in parallel and waits
+        until they are on the booking page.
+        This blocks, so it is meant to be called at start-up, before the event loop runs.
+        """
+        logger.info(f"Starting driver pool with {self.size} session(s), hot spare: {self.hot_spare}...")
+        sessions = [self._new_session() for _ in range(self.size + int(self.hot_spare))]
+        futures = [s.executor.submit(s.start) for s in sessions]
+        for session, future in zip(sessions, futures):
+            if not future.result():
+                logger.warning(f"{session.name} could not open the booking page at start-up.")
+        if self.hot_spare:
+            self.spare = sessions.pop()
+        for session in sessions:
+            self.sessions.append(session)
+            self._idle.put_nowait(session)
+
+    @property
+    def sessions_created(self) -> int:
+        """Number of sessions created so far; it grows whenever a session is replaced."""
+        return self._counter
+
+    @property
+    def idle_count(self) -> int:
+        """Number of sessions currently waiting to be leased."""
+        return self._idle.qsize()
+
+    @asynccontextmanager
+    async def lease(self, timeout: float | None = None) -> AsyncIterator[BrowserSession]:
+        """
+        Leases a session for the duration of the `async with` block.
+        The session is returned to the pool afterwards, or recycled if the block raised.
+        Args:
+            timeout (float | None): Seconds to wait for an idle session, forever if None.
+                Sessions can be held for minutes while being recovered, so interactive
+                callers should set one.
+        Raises:
+            LeaseTimeout: If no session became idle in time.
+        """
+        try:
+            session = await asyncio.wait_for(self._idle.get(), timeout)
+        except asyncio.TimeoutError:
+            raise LeaseTimeout(f"No browser session became idle within {timeout}s") from None
+        failed = False
+        try:
+            if session.loaded_on != date.today():
+                # The day list changes at midnight, refresh before handing the session out
+                await self.governor.acquire(RequestCategory.REFRESH)
+                await session.run(session.reload)
+            yield session
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._release(session, failed)
+
+    @asynccontextmanager
+    async def lease_for_booking(self) -> AsyncIterator[BrowserSession]:
+        """
+        Leases a session to be handed to a booking.
+        If a warm spare is ready it takes the leased session's place in the pool right
+        away, so polling goes on without a gap; the booked session is then discarded
+        instead of being re-opened, and a fresh spare is warmed up in the background.
+        Without a spare this behaves like lease().
+        """
+        if not self.spare:
+            async with self.lease() as session:
+                yield session
+                # Leave the confirmation page before the session goes back to polling: a reload
+                # there would replay the booking request
+                await self.governor.acquire(RequestCategory.REFRESH)
+                await session.run(session.open_bookings_page)
+            return
+
+        session = await self._idle.get()
+        spare, self.spare = self.spare, None
+        self.sessions.remove(session)
+        self.sessions.append(spare)
+        self._idle.put_nowait(spare)
+        logger.info(f"{spare.name} took over polling while {session.name} books.")
+        self._spawn(self._warm_spare())
+        try:
+            if session.loaded_on != date.today():
+                await self.governor.acquire(RequestCategory.BOOKING)
+                await session.run(session.reload)
+            yield session
+        finally:
+            self._spawn(self._discard(session))
+
+    def _release(self, session: BrowserSession, failed: bool) -> None:
+        session.uses += 1
+        if failed:
+            logger.info(f"{session.name} failed during its lease, recovering it.")
+            self._spawn(self._recover_or_replace(session))
+        elif session.uses >= self.max_uses and session not in self._recycling:
+            self._idle.put_nowait(session)
+            self._recycling.add(session)
+            self._spawn(self._recycle(session, f"{session.uses} uses"))
+        else:
+            self._spawn(self._check_and_return(session))
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _check_and_return(self, session: BrowserSession) -> None:
+        """
+        Health-checks a returned session and puts it back on the idle queue,
+        recovering it if the leaseholder left it off the booking page.
+        """
+        if await session.run(session.is_on_booking_page):
+            self._idle.put_nowait(session)
+            return
+        logger.info(f"{session.name} is not on the booking page, recovering it.")
+        await self._recover_or_replace(session)
+
+    async def _recover_or_replace(self, session: BrowserSession) -> None:
+        """
+        Runs the recovery escalation on a session, replacing its driver if nothing else worked.
+        """
+        if await self.recovery.recover(session):
+            self._idle.put_nowait(session)
+        else:
+            await self._replace(session)
+
+    async def _discard(self, session: BrowserSession) -> None:
+        """
+        Quits a session and stops its executor.
+        """
+        if session in self.sessions:
+            self.sessions.remove(session)
+        await session.run(session.quit)
+        session.executor.shutdown(wait=False)
+
+    async def _start_new_session(self) -> BrowserSession:
+        """
+        Starts a new session on the booking page, retrying until the browser comes up.
+        """
+        while True:
+            new_session = self._new_session()
+            await self.recovery.breaker.wait_closed()
+            await self.governor.acquire(RequestCategory.REFRESH)
+            try:
+                if not await new_session.run(new_session.start):
+                    logger.warning(f"{new_session.name} could not open the booking page.")
+                    if await new_session.run(new_session.is_access_denied):
+                        self.recovery.breaker.trip("access denied redirect")
+                return new_session
+            except Exception as e:
+                logger.error(f"Could not start {new_session.name}: {e}. Retrying in {RESTART_RETRY_DELAY}s.")
+                await new_session.run(new_session.quit)
+                new_session.executor.shutdown(wait=False)
+                await asyncio.sleep(RESTART_RETRY_DELAY)
+
+    async def _replace(self, session: BrowserSession) -> None:
+        """
+        Quits a session and adds a freshly started one in its place, unless _recycle()
+        is already warming its replacement.
+        """
+        # Checked before the first await: _recycle() stops tracking the session once it left the pool
+        recycling = session in self._recycling
+        await self._discard(session)
+        if recycling:
+            logger.info(f"{session.name} discarded, its replacement is already being warmed.")
+            return
+        new_session = await self._start_new_session()
+        logger.info(f"{new_session.name} replaced {session.name}.")
+        self.sessions.append(new_session)
+        self._idle.put_nowait(new_session)
+
+    def _take_idle(self, session: BrowserSession) -> bool:
+        """
+        Removes a given session from the idle queue, if it is there.
+        """
+        idle = []
+        while not self._idle.empty():
+            idle.append(self._idle.get_nowait())
+        for other in idle:
+            if other is not session:
+                self._idle.put_nowait(other)
+        return session in idle
+
+    async def _recycle(self, session: BrowserSession, reason: str) -> None:
+        """
+        Replaces a session without a gap in polling: a new session is warmed on the
+        booking page and put in the pool first, and the old one is quit as soon as it
+        is idle, i.e. between two leases.
+        """
+        logger.info(f"Recycling {session.name} ({reason}), warming its replacement first.")
+        try:
+            new_session = await self._start_new_session()
+            self.sessions.append(new_session)
+            self._idle.put_nowait(new_session)
+            while session in self.sessions:
+                if self._take_idle(session):
+                    await self._discard(session)
+                    logger.info(f"{new_session.name} replaced {session.name}.")
+                    break
+                await asyncio.sleep(1)
+            else:
+                # The session left the pool another way (e.g. handed to a booking, the hot
+                # spare taking its place): drop the extra session rather than grow the pool
+                if len(self.sessions) > self.size and self._take_idle(new_session):
+                    await self._discard(new_session)
+                    logger.info(f"{session.name} was replaced meanwhile, dropped {new_session.name}.")
+        finally:
+            self._recycling.discard(session)
+
+    async def maintain(self, lifecycle: DriverLifecycle) -> None:
+        """
+        Recycles the sessions (and the hot spare) that reached a lifecycle limit.
+        """
+        for session in list(self.sessions):
+            if session in self._recycling:
+                continue
+            reason = lifecycle.recycle_reason(session)
+            if reason:
+                self._recycling.add(session)
+                self._spawn(self._recycle(session, reason))
+        spare = self.spare
+        if spare and spare not in self._recycling:
+            reason = lifecycle.recycle_reason(spare)
+            if reason:
+                self._recycling.add(spare)
+                self._spawn(self._recycle_spare(spare, reason))
+
+    async def _recycle_spare(self, spare: BrowserSession, reason: str) -> None:
+        """
+        Swaps the hot spare for a fresh one. The spare is never leased, so no need to wait.
+        """
+        logger.info(f"Recycling hot spare {spare.name} ({reason}).")
+        try:
+            new_spare = await self._start_new_session()
+            if self.spare is spare:
+                self.spare = new_spare
+                await self._discard(spare)
+            else:
+                # The spare was handed over to polling meanwhile, it is recycled as a pooled session
+                await self._discard(new_spare)
+        finally:
+            self._recycling.discard(spare)
+
+    async def _warm_spare(self) -> None:
+        """
+        Starts a new hot spare session in the background.
+        """
+        spare = await self._start_new_session()
+        logger.info(f"{spare.name} is warmed up as hot spare.")
+        self.spare = spare
+
+    async def close(self) -> None:
+        """
+        Cancels pending recycling and quits every session.
+        """
+        for task in list(self._background):
+            task.cancel()
+        if self.spare:
+            self.sessions.append(self.spare)
+            self.spare = None
+        for session in list(self.sessions):
+            await session.run(session.quit)
+            session.executor.shutdown()
+        self.sessions.clear()
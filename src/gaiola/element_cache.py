@@ -0,0 +1,67 @@
+# src/gaiola/element_cache.py
+import logging
+from typing import Any, Callable
+
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+Locator = tuple[str, str]
+
+class ElementCache:
+    """
+    Resolves elements lazily by locator and caches them until they go stale.
+    A stale element is re-resolved on the spot instead of reloading the page,
+    which is what a page refresh or a widget re-render usually requires.
+    """
+    def __init__(self, driver: WebDriver):
+        """
+        Initializes an empty cache for the given driver.
+        Args:
+            driver (WebDriver): The driver used to resolve elements.
+        """
+        self.driver = driver
+        self._elements: dict[Locator, WebElement] = {}
+
+    def get(self, locator: Locator, refresh: bool = False) -> WebElement:
+        """
+        Returns the element for a locator, resolving it if not cached (or if refresh is set).
+        Raises:
+            NoSuchElementException: If the element is not on the page.
+        """
+        if refresh or locator not in self._elements:
+            self._elements[locator] = self.driver.find_element(*locator)
+        return self._elements[locator]
+
+    def put(self, locator: Locator, element: WebElement) -> None:
+        """
+        Caches an element that was resolved elsewhere (e.g. by a snapshot script).
+        """
+        self._elements[locator] = element
+
+    def act(self, locator: Locator, action: Callable[[WebElement], Any]) -> Any:
+        """
+        Runs an action on the element of a locator, re-resolving the element once
+        if it turned out to be stale.
+        Args:
+            locator (Locator): A (By, value) pair.
+            action (Callable): Function taking the element.
+        Returns:
+            Any: The value returned by the action.
+        """
+        try:
+            return action(self.get(locator))
+        except StaleElementReferenceException:
+            logger.info(f"Stale element for {locator[1]}, re-resolving it.")
+            metrics.inc("stale_elements")
+            return action(self.get(locator, refresh=True))
+
+    def invalidate(self) -> None:
+        """
+        Forgets every cached element, e.g. after a navigation.
+        """
+        self._elements.clear()
@@ -0,0 +1,56 @@
+# src/gaiola/executor.py
+import asyncio
+import functools
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+class DriverExecutor:
+    """
+    Runs blocking WebDriver calls on a dedicated worker thread.
+    Selenium drivers are not thread-safe, so every call for a given driver is
+    serialized on a single thread, while the asyncio event loop used by the
+    Telegram bot stays free to answer commands and callbacks.
+    """
+    def __init__(self, name: str = "driver"):
+        """
+        Initializes the executor with a single worker thread.
+        Args:
+            name (str): Prefix for the worker thread name, useful in logs and debuggers.
+        """
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs a blocking function on the worker thread and awaits its result.
+        Args:
+            func (Callable): The blocking function to run.
+            *args, **kwargs: Arguments forwarded to the function.
+        Returns:
+            Any: The value returned by the function.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs a blocking function on the worker thread and waits for it synchronously.
+        Meant for code that runs outside the event loop (e.g. start-up).
+        """
+        return self._executor.submit(func, *args, **kwargs).result()
+
+    def submit(self, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Schedules a blocking function on the worker thread without waiting for it.
+        """
+        return self._executor.submit(func, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops the worker thread once pending calls have completed.
+        """
+        logger.info(f"Shutting down driver executor '{self.name}'")
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,148 @@
+# src/gaiola/governor.py
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import AsyncIterator
+
+from src.utils.config import Config
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class RequestCategory(Enum):
+    """
+    Enum of the kinds of outbound site traffic, in priority order.
+    """
+    BOOKING = "booking"
+    CANCEL = "cancel"
+    REFRESH = "refresh"
+    POLL = "poll"
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per minute, holding at most `capacity`.
+    """
+    def __init__(self, rate_per_minute: float, capacity: float | None = None):
+        self.rate = rate_per_minute / 60
+        self.capacity = capacity or max(1.0, rate_per_minute / 4)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available, 0 if one is available now."""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        """Takes a token, possibly going into debt (used by top-priority traffic)."""
+        self._refill()
+        self.tokens -= 1
+
+class RequestGovernor:
+    """
+    Central rate limiter that every navigation, refresh and probe goes through.
+    Each RequestCategory has its own token bucket (Config.GOVERNOR_BUDGETS, requests
+    per minute) and all of them share a global one (Config.GOVERNOR_GLOBAL_PER_MINUTE),
+    which keeps us well clear of the site's "accesso non consentito" block.
+    Bookings are never delayed: they may overdraw the buckets, and polls are held
+    while a booking is in progress.
+    """
+    def __init__(self, config: Config):
+        """
+        Args:
+            config (Config): The application configuration object.
+        """
+        budgets = self.parse_budgets(config.GOVERNOR_BUDGETS)
+        self.buckets = {category: TokenBucket(budgets[category]) for category in RequestCategory}
+        self.global_bucket = TokenBucket(config.GOVERNOR_GLOBAL_PER_MINUTE)
+        self.granted = {category: 0 for category in RequestCategory}
+        self.waited = {category: 0.0 for category in RequestCategory}
+        self._bookings_active = 0
+        self._no_booking = asyncio.Event()
+        self._no_booking.set()
+
+    @staticmethod
+    def parse_budgets(spec: str) -> dict[RequestCategory, float]:
+        """
+        Parses a "poll=120,refresh=10,..." budget specification.
+        Raises:
+            ValueError: If a category is unknown or missing.
+        """
+        budgets = {}
+        for part in spec.split(","):
+            name, value = part.split("=")
+            budgets[RequestCategory(name.strip())] = float(value)
+        missing = [c.value for c in RequestCategory if c not in budgets]
+        if missing:
+            raise ValueError(f"Missing governor budget for: {', '.join(missing)}")
+        return budgets
+
+    async def acquire(self, category: RequestCategory) -> None:
+        """
+        Waits until a request of the given category may be sent.
+        """
+        started = time.monotonic()
+        while True:
+            if category == RequestCategory.POLL:
+                # Bookings preempt polls
+                await self._no_booking.wait()
+            bucket = self.buckets[category]
+            wait = 0.0 if category == RequestCategory.BOOKING else max(bucket.wait_time(), self.global_bucket.wait_time())
+            if wait == 0:
+                bucket.take()
+                self.global_bucket.take()
+                break
+            await asyncio.sleep(wait)
+        self.granted[category] += 1
+        waited = time.monotonic() - started
+        self.waited[category] += waited
+        metrics.inc("site_requests", category=category.value)
+        metrics.observe("governor_wait", waited)
+        if waited > 1:
+            logger.info(f"Governor delayed a {category.value} request by {waited:.1f}s")
+
+    @asynccontextmanager
+    async def booking(self) -> AsyncIterator[None]:
+        """
+        Marks a booking in progress for the duration of the block: polls are held
+        until it is over. Acquires a booking token on entry.
+        """
+        self._bookings_active += 1
+        self._no_booking.clear()
+        try:
+            await self.acquire(RequestCategory.BOOKING)
+            yield
+        finally:
+            self._bookings_active -= 1
+            if self._bookings_active == 0:
+                self._no_booking.set()
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """
+        Returns, per category and globally, the granted requests, the total time spent
+        waiting and the tokens currently available out of the bucket capacity.
+        """
+        stats = {}
+        for category, bucket in self.buckets.items():
+            bucket.wait_time() # Refresh the token count
+            stats[category.value] = {
+                "granted": self.granted[category],
+                "waited_s": round(self.waited[category], 1),
+                "tokens": round(bucket.tokens, 1),
+                "capacity": bucket.capacity,
+            }
+        self.global_bucket.wait_time()
+        stats["global"] = {
+            "granted": sum(self.granted.values()),
+            "waited_s": round(sum(self.waited.values()), 1),
+            "tokens": round(self.global_bucket.tokens, 1),
+            "capacity": self.global_bucket.capacity,
+        }
+        return stats
@@ -0,0 +1,232 @@
+# src/gaiola/lean_profile.py
+import logging
+import os
+import select
+import socket
+import socketserver
+import threading
+
+from src.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Firefox prefs blocking each resource type that can be listed in Config.LEAN_BLOCK_TYPES
+RESOURCE_TYPE_PREFS = {
+    "images": {"permissions.default.image": 2},
+    "stylesheets": {"permissions.default.stylesheet": 2},
+    "fonts": {"gfx.downloadable_fonts.enabled": False, "browser.display.use_document_fonts": 0},
+    "media": {"media.autoplay.default": 5, "media.autoplay.blocking_policy": 2, "media.preload.default": 0},
+    "trackers": {
+        "privacy.trackingprotection.enabled": True,
+        "privacy.trackingprotection.socialtracking.enabled": True,
+        "privacy.trackingprotection.cryptomining.enabled": True,
+        "privacy.trackingprotection.fingerprinting.enabled": True,
+    },
+}
+
+# Prefs keeping the browser to a single, small content process, with no disk cache
+# (spares the Pi's SD card) and no cached pages for back/forward navigation
+MEMORY_BOUNDED_PREFS = {
+    "fission.autostart": False,
+    "dom.ipc.processCount": 1,
+    "dom.ipc.processCount.webIsolated": 1,
+    "dom.ipc.processPrelaunch.enabled": False,
+    "browser.tabs.remote.separatePrivilegedContentProcess": False,
+    "browser.cache.disk.enable": False,
+    "browser.cache.memory.capacity": 32768, # KB
+    "media.memory_cache_max_size": 4096, # KB
+    "browser.sessionhistory.max_total_viewers": 0,
+    "browser.sessionstore.interval": 600000,
+    "extensions.pocket.enabled": False,
+    "browser.safebrowsing.malware.enabled": False,
+    "browser.safebrowsing.phishing.enabled": False,
+    "network.prefetch-next": False,
+    "network.dns.disablePrefetch": True,
+    "network.http.speculative-parallel-limit": 0,
+}
+
+def _split(value: str) -> list[str]:
+    return [item.strip().lower() for item in value.split(",") if item.strip()]
+
+def is_blocked_host(host: str, blocked_domains: list[str]) -> bool:
+    """
+    Whether a host is one of the blocked domains or a subdomain of one.
+    """
+    host = host.lower().rstrip(".")
+    return any(host == d or host.endswith("." + d) for d in blocked_domains)
+
+def lean_prefs(config: Config) -> dict:
+    """
+    Returns the Firefox prefs of the lean profile: the resource types in
+    Config.LEAN_BLOCK_TYPES are blocked, content processes are memory-bounded and,
+    if Config.LEAN_PROXY_PORT is set, traffic goes through the local filtering proxy
+    that drops the domains in Config.LEAN_BLOCK_DOMAINS.
+    Raises:
+        ValueError: If a resource type is unknown.
+    """
+    prefs = dict(MEMORY_BOUNDED_PREFS)
+    for resource_type in _split(config.LEAN_BLOCK_TYPES):
+        if resource_type not in RESOURCE_TYPE_PREFS:
+            raise ValueError(f"Unknown LEAN_BLOCK_TYPES entry: {resource_type}")
+        prefs.update(RESOURCE_TYPE_PREFS[resource_type])
+    if config.LEAN_PROXY_PORT:
+        get_filtering_proxy(config)
+        prefs.update({
+            "network.proxy.type": 1,
+            "network.proxy.http": config.LEAN_PROXY_HOST,
+            "network.proxy.http_port": config.LEAN_PROXY_PORT,
+            "network.proxy.ssl": config.LEAN_PROXY_HOST,
+            "network.proxy.ssl_port": config.LEAN_PROXY_PORT,
+            "network.proxy.no_proxies_on": "",
+        })
+    return prefs
+
+class _ProxyHandler(socketserver.BaseRequestHandler):
+    """
+    Handles one proxied connection: CONNECT tunnels for HTTPS and absolute-URI
+    requests for plain HTTP, answering 403 for blocked hosts.
+    """
+    server: "FilteringProxy"
+
+    def handle(self) -> None:
+        head = b""
+        while b"\r\n\r\n" not in head:
+            chunk = self.request.recv(4096)
+            if not chunk:
+                return
+            head += chunk
+            if len(head) > 65536:
+                return
+        request_line, _, rest = head.partition(b"\r\n")
+        try:
+            method, target, version = request_line.decode("latin-1").split(" ")
+        except ValueError:
+            return
+
+        if method == "CONNECT":
+            host, _, port = target.rpartition(":")
+            port = int(port or 443)
+        else:
+            # http://host[:port]/path
+            authority = target.split("://", 1)[-1].split("/", 1)[0]
+            host, _, port = authority.partition(":")
+            port = int(port or 80)
+
+        if is_blocked_host(host, self.server.blocked_domains):
+            self.server.blocked += 1
+            self.request.sendall(b"HTTP/1.1 403 Forbidden\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            return
+
+        try:
+            upstream = socket.create_connection((host, port), timeout=10)
+        except OSError:
+            self.request.sendall(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            return
+        with upstream:
+            self.server.allowed += 1
+            if method == "CONNECT":
+                self.request.sendall(b"HTTP/1.1 200 Connection Established\r\n\r\n")
+            else:
+                # One request per connection, so keep-alive cannot carry requests to other hosts
+                headers, _, body = rest.partition(b"\r\n\r\n")
+                headers = b"\r\n".join(
+                    h for h in headers.split(b"\r\n")
+                    if not h.lower().startswith((b"connection:", b"proxy-connection:", b"keep-alive:"))
+                )
+                upstream.sendall(request_line + b"\r\n" + headers + b"\r\nConnection: close\r\n\r\n" + body)
+            self._relay(upstream)
+
+    def _relay(self, upstream: socket.socket) -> None:
+        sockets = [self.request, upstream]
+        while True:
+            readable, _, errored = select.select(sockets, [], sockets, 60)
+            if errored or not readable:
+                return
+            for sock in readable:
+                data = sock.recv(65536)
+                if not data:
+                    return
+                (upstream if sock is self.request else self.request).sendall(data)
+
+class FilteringProxy(socketserver.ThreadingTCPServer):
+    """
+    Minimal local HTTP/HTTPS proxy that refuses connections to blocked domains,
+    for the blocks Firefox prefs cannot express (analytics, fonts and tracker hosts).
+    HTTPS is tunnelled untouched, so no certificate is involved.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, bind_host: str, port: int, blocked_domains: list[str]):
+        """
+        Args:
+            bind_host (str): Address to listen on.
+            port (int): Port to listen on.
+            blocked_domains (list[str]): Domains (and their subdomains) to refuse.
+        """
+        super().__init__((bind_host, port), _ProxyHandler)
+        self.blocked_domains = blocked_domains
+        self.blocked = 0
+        self.allowed = 0
+
+    def start(self) -> None:
+        """
+        Serves in a background daemon thread.
+        """
+        threading.Thread(target=self.serve_forever, name="filtering-proxy", daemon=True).start()
+        logger.info(f"Filtering proxy listening on {self.server_address[0]}:{self.server_address[1]}, "
+                    f"blocking {len(self.blocked_domains)} domain(s).")
+
+_proxy: FilteringProxy | None = None
+_proxy_lock = threading.Lock()
+
+def get_filtering_proxy(config: Config) -> FilteringProxy:
+    """
+    Returns the filtering proxy of this process, starting it on first use.
+    It listens on loopback unless the browser reaches it from elsewhere (Selenium grid).
+    """
+    global _proxy
+    with _proxy_lock:
+        if _proxy is None:
+            bind_host = "127.0.0.1" if config.LEAN_PROXY_HOST in ("127.0.0.1", "localhost") else "0.0.0.0"
+            _proxy = FilteringProxy(bind_host, config.LEAN_PROXY_PORT, _split(config.LEAN_BLOCK_DOMAINS))
+            _proxy.start()
+        return _proxy
+
+def process_tree_rss_kb(pid: int) -> int | None:
+    """
+    Returns the resident memory, in KB, of a process and all its descendants
+    (Firefox runs its content processes as children), read from /proc.
+    Returns None where /proc is not available or the process is gone.
+    """
+    children: dict[int, list[int]] = {}
+    try:
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as stat_file:
+                    # The command name may contain spaces, the parent pid follows it
+                    ppid = int(stat_file.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    except OSError:
+        return None
+
+    total = 0
+    stack = [pid]
+    found = False
+    while stack:
+        current = stack.pop()
+        try:
+            with open(f"/proc/{current}/status") as status_file:
+                for line in status_file:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+                        break
+            found = True
+        except OSError:
+            continue
+        stack.extend(children.get(current, []))
+    return total if found else None
@@ -0,0 +1,47 @@
+# src/gaiola/lifecycle.py
+import logging
+import time
+
+from src.gaiola.session import BrowserSession
+from src.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Name of the periodic job checking the browser sessions against the lifecycle limits
+LIFECYCLE_JOB_NAME = "driver_lifecycle"
+
+class DriverLifecycle:
+    """
+    Tells when a long-running browser session is due for replacement, before Firefox's
+    memory growth makes the Pi swap: after Config.DRIVER_MAX_AGE_HOURS, after
+    Config.DRIVER_MAX_NAVIGATIONS page loads, or once the browser process tree exceeds
+    Config.DRIVER_MAX_RSS_MB (only measurable for a local Firefox driver, never on the Selenium grid).
+    The owners of the sessions do the actual swap, warming the new session first.
+    """
+    def __init__(self, config: Config):
+        """
+        Args:
+            config (Config): The application configuration object.
+        """
+        self.max_age = config.DRIVER_MAX_AGE_HOURS * 3600
+        self.max_navigations = config.DRIVER_MAX_NAVIGATIONS
+        self.max_rss_kb = config.DRIVER_MAX_RSS_MB * 1024
+
+    def recycle_reason(self, session: BrowserSession) -> str | None:
+        """
+        Checks a session against the limits. Makes no WebDriver call, so it is safe
+        from any thread.
+        Returns:
+            str | None: Why the session should be replaced, or None if it can keep going.
+        """
+        if session.started_at is None:
+            return None
+        age = time.monotonic() - session.started_at
+        if age > self.max_age:
+            return f"age {age / 3600:.1f}h"
+        if session.navigations >= self.max_navigations:
+            return f"{session.navigations} navigations"
+        rss_kb = session.browser_rss_kb()
+        if rss_kb and rss_kb > self.max_rss_kb:
+            return f"browser RSS {rss_kb // 1024} MB"
+        return None
@@ -1,22 +1,29 @@
 # src/gaiola/models.py
-from dataclasses import dataclass
+import hashlib
+from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
+from typing import NamedTuple
+
+from src.data.people_data import Person
 
 @dataclass
 class Day:
     """
     Dataclass to represent an available day on the Gaiola booking website.
-    It stores date information, the associated button element, and availability counts.
+    It stores date information and availability counts. The date string is also the
+    stable locator of the day's button; browser sessions resolve the live element
+    themselves, so a Day never goes stale.
     """
     date: str
-    button: any # Selenium WebElement for the date button
     day_number: int
     day_name: str
     new_disp_morning: int = 0
     prev_disp_morning: int = 0
     new_disp_noon: int = 0
     prev_disp_noon: int = 0
+    # Turni with a known availability (read, or restored from a previous run)
+    read_turni: set["Turno"] = field(default_factory=set)
 
     def __repr__(self) -> str:
         """
@@ -27,6 +34,40 @@ class Day:
                 f"prev_disp_noon: {self.prev_disp_noon}, "
                 f"new_disp_noon: {self.new_disp_noon}")
 
+    def copy_history_from(self, other: "Day") -> None:
+        """
+        Carries the availability history of another Day (same date) over to this one.
+        """
+        self.new_disp_morning, self.prev_disp_morning = other.new_disp_morning, other.prev_disp_morning
+        self.new_disp_noon, self.prev_disp_noon = other.new_disp_noon, other.prev_disp_noon
+        self.read_turni = set(other.read_turni)
+
+    def has_baseline(self, turno: "Turno") -> bool:
+        """
+        Whether the availability of the given turno is known, i.e. prev_disp() is a real
+        reading rather than the initial 0.
+        """
+        return turno in self.read_turni
+
+    def prev_disp(self, turno: "Turno") -> int:
+        """
+        Returns the last known availability for the given turno.
+        """
+        return self.prev_disp_morning if turno == Turno.MATTINO else self.prev_disp_noon
+
+    def update_disp(self, turno: "Turno", value: int) -> None:
+        """
+        Records a new availability reading for the given turno, which also becomes
+        the baseline for the next comparison.
+        """
+        if turno == Turno.MATTINO:
+            self.new_disp_morning = value
+            self.prev_disp_morning = value
+        else:
+            self.new_disp_noon = value
+            self.prev_disp_noon = value
+        self.read_turni.add(turno)
+
 class Turno(Enum):
     """
     Enum to represent the booking shifts (Mattino/Pomeriggio).
@@ -34,3 +75,54 @@ class Turno(Enum):
     MATTINO = "Mattino"
     POMERIGGIO = "Pomeriggio"
 
+
+class WatchKey(NamedTuple):
+    """
+    Identity of a watch: two watches with the same key watch the same thing.
+    Every member is sorted, so the order the user picked things in does not matter.
+    """
+    chat_id: int
+    people: tuple[str, ...] # codici fiscali
+    dates: tuple[str, ...]
+    turni: tuple[str, ...]
+
+@dataclass
+class Watch:
+    """
+    Dataclass to represent a request to watch one or more dates for a group of people,
+    all booked together in one submission once a turno has a spot for each of them.
+    Watches are checked by the shared availability sweep.
+    """
+    chat_id: int
+    name: str
+    people: list[Person]
+    dates: list[str]
+    turni: list[Turno] = field(default_factory=lambda: [Turno.MATTINO])
+
+
+    @property
+    def people_names(self) -> str:
+        """
+        Returns the names of the watched people, comma separated.
+        """
+        return ", ".join(p.name for p in self.people)
+
+    @property
+    def key(self) -> WatchKey:
+        """
+        Returns the identity of the watch: chat, people, dates and turni.
+        """
+        return WatchKey(
+            self.chat_id,
+            tuple(sorted(p.cf for p in self.people)),
+            tuple(sorted(self.dates)),
+            tuple(sorted(t.name for t in self.turni)),
+        )
+
+    @property
+    def watch_id(self) -> str:
+        """
+        Returns a short id derived from the key, stable across restarts and short
+        enough for Telegram callback data.
+        """
+        return hashlib.sha1(repr(self.key).encode()).hexdigest()[:8]
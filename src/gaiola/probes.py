@@ -0,0 +1,464 @@
+# src/gaiola/probes.py
+import asyncio
+import json
+import logging
+import re
+from abc import ABC, abstractmethod
+from datetime import datetime, date
+from urllib.parse import quote
+
+import httpx
+
+from src.gaiola.driver_pool import DriverPool, LeaseTimeout
+from src.gaiola.governor import RequestCategory, RequestGovernor
+from src.gaiola.lifecycle import DriverLifecycle
+from src.gaiola.recovery import SessionRecovery
+from src.gaiola.session import BrowserSession, TURNO_RADIO_LABELS
+from src.gaiola.models import Day, Turno
+from src.utils.config import Config
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Ids of the turni as used by the booking widget (904_turno_1, 904_turno_2)
+TURNO_IDS = {
+    Turno.MATTINO: 1,
+    Turno.POMERIGGIO: 2,
+}
+
+class ProbeError(Exception):
+    """
+    Raised when a probe could not read the availability, but the browser page
+    itself is not affected and does not need to be recovered.
+    """
+
+class AvailabilityProbe(ABC):
+    """
+    Interface of the engines that read the availability of a date.
+    Every read goes through the request governor as poll traffic, one token per
+    site request it makes.
+    """
+    name = "base"
+    governor: RequestGovernor
+    # Site requests made by one read()
+    requests_per_read = 1
+
+    @abstractmethod
+    async def read(self, day: Day) -> dict[Turno, int]:
+        """
+        Reads the available spots of both turni for the given day.
+        Args:
+            day (Day): The day to read.
+        Returns:
+            dict[Turno, int]: Available spots per turno.
+        """
+
+    async def read_many(self, days: list[Day]) -> dict[str, dict[Turno, int]]:
+        """
+        Reads several days concurrently, logging failures instead of raising.
+        Args:
+            days (list[Day]): The days to read.
+        Returns:
+            dict[str, dict[Turno, int]]: Available spots per date and turno, for the days read successfully.
+        """
+        async def read_logged(day: Day) -> dict[Turno, int] | None:
+            logger.info(f"Checking {day.day_name} {day.date}")
+            try:
+                for _ in range(self.requests_per_read):
+                    await self.governor.acquire(RequestCategory.POLL)
+                with metrics.timer(f"probe_read_{self.name}"):
+                    return await self.read(day)
+            except ProbeError as e:
+                # The browser page is untouched, so there is nothing to recover
+                logger.error(f"Probe error for {day.date}: {e}")
+            except Exception as e:
+                # A session that failed during the read is recycled by the pool
+                logger.error(f"Error checking availability for {day.date}: {e}")
+            return None
+
+        results = await asyncio.gather(*[read_logged(d) for d in days])
+        return {day.date: counts for day, counts in zip(days, results) if counts is not None}
+
+    async def maintain(self, lifecycle: DriverLifecycle) -> None:
+        """
+        Replaces the browser sessions owned by the probe itself that reached a lifecycle limit.
+        """
+
+    async def close(self) -> None:
+        """
+        Releases any resource held by the probe.
+        """
+
+class SeleniumProbe(AvailabilityProbe):
+    """
+    Reads availability by driving the booking widget on a pooled browser session.
+    """
+    name = "selenium"
+
+    def __init__(self, pool: DriverPool, governor: RequestGovernor):
+        self.pool = pool
+        self.governor = governor
+
+    async def read(self, day: Day) -> dict[Turno, int]:
+        async with self.pool.lease() as session:
+            # Date click, both turno clicks and both reads happen in one script call
+            return await session.run(session.read_day_availability, day.date)
+
+class HttpProbe(AvailabilityProbe):
+    """
+    Reads availability by replaying the backend request of the booking widget
+    with a pooled HTTP session, without touching the browser.
+    The request URL is a template, from Config.HTTP_PROBE_URL or discovered from the
+    widget's own requests (see template_from_request), with the placeholders
+    {date} (dd/mm/YYYY), {date_iso} (YYYY-mm-dd) and {turno} (1 or 2), so it can also
+    point at a local stub server serving recorded responses (src/http_probe_stub.py).
+    The HTTP session shares the browser's cookies, re-synced from a pooled session
+    whenever the pool started new sessions or the site answers 401/403.
+    """
+    name = "http"
+    # One request per turno
+    requests_per_read = len(Turno)
+
+    # Keys that may hold the availability count in a JSON response
+    JSON_KEYS = ("disponibilita_effettiva", "disponibilita", "posti_disponibili", "posti")
+    # Text form used by the widget, e.g. "Posti disponibili: 3"
+    TEXT_PATTERN = re.compile(r"disponibil\w*[^:\d]*:\s*(\d+)", re.IGNORECASE)
+    # Query parameter holding the turno id in a widget request
+    TURNO_PARAM_PATTERN = re.compile(r"([?&][^=&]*turno[^=&]*=)(\d+)", re.IGNORECASE)
+
+    def __init__(self, config: Config, user_agent: str, governor: RequestGovernor,
+                 pool: DriverPool | None = None, url_template: str | None = None):
+        """
+        Initializes the probe with a pooled HTTP client.
+        Args:
+            config (Config): The application configuration object.
+            user_agent (str): The User-Agent sent with every request, same as the browser's.
+            governor (RequestGovernor): The governor every request goes through.
+            pool (DriverPool | None): The pool cookies are re-synced from, if any.
+            url_template (str | None): The request URL template, Config.HTTP_PROBE_URL if not given.
+        """
+        self.governor = governor
+        self.pool = pool
+        self.lease_timeout = config.DRIVER_LEASE_TIMEOUT
+        self.url_template = url_template or config.HTTP_PROBE_URL
+        self.client = httpx.AsyncClient(
+            headers={"User-Agent": user_agent, "X-Requested-With": "XMLHttpRequest"},
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=4),
+            timeout=httpx.Timeout(5.0),
+            follow_redirects=True,
+        )
+        self._cookies_lock = asyncio.Lock()
+        # Pool sessions created when the cookies were last synced, and how many syncs so far
+        self._synced_generation = pool.sessions_created if pool else 0
+        self._syncs = 0
+
+    def sync_cookies(self, cookies: list[dict]) -> None:
+        """
+        Copies the browser cookies (as returned by driver.get_cookies()) into the
+        HTTP session, so the requests share the browser's booking session.
+        """
+        for cookie in cookies:
+            self.client.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""))
+        self._syncs += 1
+        logger.info(f"Synced {len(cookies)} browser cookies into the HTTP probe session.")
+
+    async def resync_cookies(self, seen_syncs: int | None = None) -> None:
+        """
+        Copies the cookies of a pooled browser session again. Skipped if another read
+        already re-synced since `seen_syncs`, or if no session is idle in time.
+        """
+        if not self.pool:
+            return
+        async with self._cookies_lock:
+            if seen_syncs is not None and self._syncs != seen_syncs:
+                return
+            generation = self.pool.sessions_created
+            try:
+                async with self.pool.lease(self.lease_timeout) as session:
+                    cookies = await session.run(session.driver.get_cookies)
+            except LeaseTimeout as e:
+                logger.warning(f"Could not re-sync the HTTP probe cookies: {e}")
+                return
+            self.sync_cookies(cookies)
+            self._synced_generation = generation
+
+    @staticmethod
+    def template_from_request(url: str, date_str: str, turno: Turno) -> str | None:
+        """
+        Turns a request URL the widget made for a date and turno into a URL template,
+        replacing the date (plain, URL-encoded or ISO) and the turno query parameter
+        with their placeholders.
+        Returns:
+            str | None: The template, or None if the URL does not carry both.
+        """
+        date_iso = datetime.strptime(date_str, "%d/%m/%Y").strftime("%Y-%m-%d")
+        template = url.replace("{", "{{").replace("}", "}}")
+        with_date = template
+        for value, placeholder in ((date_str, "{date}"), (quote(date_str, safe=""), "{date}"), (date_iso, "{date_iso}")):
+            with_date = with_date.replace(value, placeholder)
+        match = HttpProbe.TURNO_PARAM_PATTERN.search(with_date)
+        if with_date == template or not match or int(match.group(2)) != TURNO_IDS[turno]:
+            return None
+        return with_date[:match.start(2)] + "{turno}" + with_date[match.end(2):]
+
+    def _build_url(self, day: Day, turno: Turno) -> str:
+        date_obj = datetime.strptime(day.date, "%d/%m/%Y")
+        return self.url_template.format(
+            date=day.date,
+            date_iso=date_obj.strftime("%Y-%m-%d"),
+            turno=TURNO_IDS[turno],
+        )
+
+    @classmethod
+    def parse_availability(cls, body: str) -> int:
+        """
+        Extracts the availability count from a response body.
+        Accepts a JSON object holding one of JSON_KEYS, a bare number or an HTML/text
+        fragment in the same form as the widget's #disponibilita_effettiva element.
+        Raises:
+            ProbeError: If no count can be found in the body.
+        """
+        body = body.strip()
+        try:
+            data = json.loads(body)
+            if isinstance(data, dict):
+                for key in cls.JSON_KEYS:
+                    if key in data:
+                        return int(data[key])
+            elif isinstance(data, (int, float)):
+                return int(data)
+        except (ValueError, TypeError):
+            pass
+
+        match = cls.TEXT_PATTERN.search(body)
+        if match:
+            return int(match.group(1))
+        raise ProbeError(f"Could not parse availability from response: {body[:100]!r}")
+
+    async def _get(self, url: str) -> httpx.Response:
+        try:
+            return await self.client.get(url)
+        except httpx.HTTPError as e:
+            raise ProbeError(f"HTTP probe request to {url} failed: {e}") from e
+
+    async def _read_turno(self, day: Day, turno: Turno) -> int:
+        url = self._build_url(day, turno)
+        syncs = self._syncs
+        response = await self._get(url)
+        if response.status_code in (401, 403) and self.pool:
+            # The browser session the cookies came from is likely gone: copy fresh ones and retry once
+            logger.info(f"HTTP probe got {response.status_code}, re-syncing cookies.")
+            await self.resync_cookies(syncs)
+            await self.governor.acquire(RequestCategory.POLL)
+            response = await self._get(url)
+        try:
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            raise ProbeError(f"HTTP probe request to {url} failed: {e}") from e
+        return self.parse_availability(response.text)
+
+    async def read(self, day: Day) -> dict[Turno, int]:
+        if self.pool and self.pool.sessions_created != self._synced_generation:
+            # Sessions were recycled or replaced since the last sync
+            await self.resync_cookies(self._syncs)
+        counts = await asyncio.gather(*[self._read_turno(day, turno) for turno in Turno])
+        return dict(zip(Turno, counts))
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+# Drained once per tick from Python, under the governor: walks every watched date and
+# turno within the one call (select the date, then each turno radio), and records a count
+# only once #disponibilita_effettiva re-rendered after that click, so a count is never
+# filed under a date the widget is not showing yet; a step that does not re-render in
+# time skips the rest of its date until the next drain. Counts are kept in the page (they survive between
+# drains) and only changes are returned. Nothing runs in the page between drains.
+# Arguments: watched dates, turno label selectors, per-step timeout in ms, callback.
+OBSERVER_DRAIN_SCRIPT = """
+const [dates, turnoLabels, timeoutMs] = arguments;
+const done = arguments[arguments.length - 1];
+const installed = Boolean(window.__gaiolaObserver);
+if (!installed) window.__gaiolaObserver = {last: {}};
+const state = window.__gaiolaObserver;
+const textOf = (el) => (el.innerText || el.textContent || '').trim();
+const target = () => document.getElementById('disponibilita_effettiva');
+
+// Resolves true once the availability element re-rendered after the click, false on timeout
+function clickAndWait(element) {
+    return new Promise((resolve) => {
+        let finished = false;
+        const finish = (rendered) => {
+            if (finished) return;
+            finished = true;
+            observer.disconnect();
+            clearTimeout(timer);
+            resolve(rendered);
+        };
+        const observer = new MutationObserver((mutations) => {
+            const current = target();
+            if (current && mutations.some(m => current === m.target || current.contains(m.target) || m.target.contains(current))) {
+                finish(true);
+            }
+        });
+        observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+        const timer = setTimeout(() => finish(false), timeoutMs);
+        element.click();
+    });
+}
+
+function readCount() {
+    const element = target();
+    const parts = element ? textOf(element).split(':') : [];
+    const count = parts.length > 1 ? parseInt(parts[1].trim(), 10) : NaN;
+    return Number.isNaN(count) ? null : count;
+}
+
+(async () => {
+    const events = [];
+    const skipped = [];
+    for (const dateText of dates) {
+        const dateButton = Array.from(document.getElementsByClassName('bottoni_data_904'))
+            .find(btn => textOf(btn) === dateText);
+        // A step that timed out may still re-render later: leave the rest of the date for the next drain
+        if (!dateButton || !await clickAndWait(dateButton)) { skipped.push(dateText); continue; }
+        for (let turno = 0; turno < turnoLabels.length; turno++) {
+            const label = document.querySelector(turnoLabels[turno]);
+            const count = label && await clickAndWait(label) ? readCount() : null;
+            const key = dateText + '|' + turno;
+            if (count === null) { skipped.push(key); break; }
+            if (state.last[key] === count) continue;
+            state.last[key] = count;
+            events.push({date: dateText, turno: turno, count: count, ts: Date.now()});
+        }
+    }
+    return {installed: installed, events: events, last: state.last, skipped: skipped};
+})().then(done, (e) => done({error: String(e)}));
+"""
+
+# Milliseconds to wait for the widget to re-render after each observer click
+OBSERVER_STEP_TIMEOUT = 1500
+
+class ObserverProbe(AvailabilityProbe):
+    """
+    Change-driven probe on a dedicated browser session: every tick is a single script
+    call that refreshes every watched date and turno on the widget, waiting for each
+    re-render with a MutationObserver, and returns only the counts that changed since
+    the previous tick. Nothing runs in the page between drains, so every site request
+    is governed and polling stops while the circuit breaker is open.
+    Latency tradeoff: a freed spot is seen within one tick plus the drain itself, which
+    takes up to (1 + turni) x OBSERVER_STEP_TIMEOUT per watched date (typically far less,
+    as steps finish on the re-render); the session is busy meanwhile, so the drain takes
+    one poll token per date like a sweep.
+    """
+    name = "observer"
+
+    def __init__(self, config: Config, governor: RequestGovernor, recovery: SessionRecovery):
+        """
+        Initializes the probe with its own browser session, outside the pool since
+        it is never returned.
+        Args:
+            config (Config): The application configuration object.
+            governor (RequestGovernor): The governor every drain goes through.
+            recovery (SessionRecovery): Recovery run on the session when a drain fails.
+        """
+        self.governor = governor
+        self.recovery = recovery
+        self.config = config
+        self.session = BrowserSession(config, "observer")
+        self._generation = 0
+        self.turni = list(TURNO_RADIO_LABELS.keys())
+
+    def start(self) -> None:
+        """
+        Starts the observer's browser on the booking page. Blocking, meant for start-up.
+        """
+        if not self.session.executor.call(self.session.start):
+            logger.warning("Observer session could not open the booking page at start-up.")
+
+    def _drain(self, dates: list[str]) -> dict:
+        if self.session.loaded_on != date.today():
+            self.session.reload()
+        # Worst case: every step of every date times out, plus slack for the round-trip
+        steps = len(dates) * (1 + len(self.turni))
+        self.session.driver.set_script_timeout(steps * OBSERVER_STEP_TIMEOUT / 1000 + 10)
+        result = self.session.driver.execute_async_script(
+            OBSERVER_DRAIN_SCRIPT, dates, [TURNO_RADIO_LABELS[t] for t in self.turni], OBSERVER_STEP_TIMEOUT
+        )
+        if result.get('error'):
+            raise ProbeError(f"Observer drain failed: {result['error']}")
+        return result
+
+    async def read(self, day: Day) -> dict[Turno, int]:
+        readings = await self.read_many([day])
+        if day.date not in readings:
+            raise ProbeError(f"No availability observed yet for {day.date}")
+        return readings[day.date]
+
+    async def read_many(self, days: list[Day]) -> dict[str, dict[Turno, int]]:
+        """
+        Refreshes every watched date and turno in one drain and returns, for every
+        changed date, the last known count of both turni. The drain reloads every date
+        on the widget, so it takes a poll token per date like a sweep.
+        """
+        dates = [d.date for d in days]
+        for _ in dates:
+            await self.governor.acquire(RequestCategory.POLL)
+        try:
+            with metrics.timer("probe_read_observer"):
+                result = await self.session.run(self._drain, dates)
+        except Exception as e:
+            logger.error(f"Error draining the availability observer: {e}")
+            if not await self.recovery.recover(self.session):
+                # Last step of the escalation: a new driver
+                await self.session.run(self.session.quit)
+                await self.governor.acquire(RequestCategory.REFRESH)
+                try:
+                    await self.session.run(self.session.start)
+                except Exception as e:
+                    logger.error(f"Could not restart the observer session: {e}")
+            return {}
+        if not result['installed']:
+            logger.info(f"Availability observer installed, watching {len(dates)} date(s).")
+        if result['skipped']:
+            logger.debug(f"Observer steps not re-rendered in time, retried next drain: {result['skipped']}")
+
+        readings: dict[str, dict[Turno, int]] = {}
+        for event in result['events']:
+            if event['date'] not in dates:
+                continue
+            last_counts = [result['last'].get(f"{event['date']}|{idx}") for idx in range(len(self.turni))]
+            # Both turni are needed to tell a stale widget reading from a freed spot
+            if None not in last_counts:
+                readings[event['date']] = dict(zip(self.turni, last_counts))
+        return readings
+
+    async def maintain(self, lifecycle: DriverLifecycle) -> None:
+        """
+        Swaps the observer session for a fresh one once it reached a lifecycle limit.
+        The new session is warmed on the booking page before it takes over; its counts
+        start over with the next drain, which reports every watched date again.
+        """
+        reason = lifecycle.recycle_reason(self.session)
+        if not reason:
+            return
+        logger.info(f"Recycling the observer session ({reason}), warming its replacement first.")
+        self._generation += 1
+        new_session = BrowserSession(self.config, f"observer-{self._generation}")
+        await self.governor.acquire(RequestCategory.REFRESH)
+        try:
+            started = await new_session.run(new_session.start)
+        except Exception as e:
+            logger.error(f"Could not start the replacement observer session: {e}")
+            started = False
+        if not started:
+            await new_session.run(new_session.quit)
+            new_session.executor.shutdown(wait=False)
+            return
+        old_session, self.session = self.session, new_session
+        # Queued after any drain still running on the old session
+        await old_session.run(old_session.quit)
+        old_session.executor.shutdown(wait=False)
+
+    async def close(self) -> None:
+        await self.session.run(self.session.quit)
+        self.session.executor.shutdown()
@@ -0,0 +1,174 @@
+# src/gaiola/recovery.py
+import asyncio
+import logging
+import time
+from enum import Enum
+
+from src.gaiola.governor import RequestCategory, RequestGovernor
+from src.gaiola.session import BrowserSession
+from src.utils.config import Config
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Backoff before a recovery, in seconds, doubled for every consecutive failed recovery
+RECOVERY_BACKOFF_BASE = 2
+RECOVERY_BACKOFF_MAX = 120
+
+# Fragments of the URLs whose reload would replay a cancellation or a booking confirmation
+REPLAYING_URL_MARKERS = ("prenotazione_cancella", "prenotazione=")
+
+class RecoveryStep(Enum):
+    """
+    Enum of the recovery steps, cheapest first.
+    """
+    RERESOLVE = "re-resolve elements"
+    REFRESH = "refresh page"
+    RENAVIGATE = "re-navigate"
+    NEW_DRIVER = "new driver"
+
+def _reresolve_elements(session: BrowserSession) -> bool:
+    """
+    Drops the session's cached elements, so they are looked up again on next use,
+    and checks that the date buttons are still on the page.
+    """
+    session.elements.invalidate()
+    return session.is_on_booking_page()
+
+def _is_on_replaying_page(session: BrowserSession) -> bool:
+    """
+    Checks whether reloading the session's current page would replay a site action.
+    """
+    try:
+        url = session.get_current_url()
+    except Exception:
+        return False
+    return any(marker in url for marker in REPLAYING_URL_MARKERS)
+
+class CircuitBreaker:
+    """
+    Pauses all polling while the site is down or blocking us.
+    Opens after Config.BREAKER_FAILURE_THRESHOLD consecutive failures, or right away
+    when the access denied redirect is seen, for Config.BREAKER_COOLDOWN seconds,
+    doubled on every consecutive trip up to Config.BREAKER_MAX_COOLDOWN.
+    Once the cooldown is over it is half-open: a single failure opens it again,
+    a success closes it.
+    """
+    def __init__(self, config: Config):
+        """
+        Args:
+            config (Config): The application configuration object.
+        """
+        self.threshold = config.BREAKER_FAILURE_THRESHOLD
+        self.cooldown = config.BREAKER_COOLDOWN
+        self.max_cooldown = config.BREAKER_MAX_COOLDOWN
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+
+    def is_open(self) -> bool:
+        """Whether polling is currently paused."""
+        return time.monotonic() < self.open_until
+
+    @property
+    def remaining(self) -> float:
+        """Seconds until the breaker is half-open again."""
+        return max(0.0, self.open_until - time.monotonic())
+
+    def record_success(self) -> None:
+        """Closes the breaker and resets the failure count."""
+        if self.trips:
+            logger.info("Site is answering again, circuit breaker closed.")
+        self.failures = 0
+        self.trips = 0
+
+    def record_failure(self) -> None:
+        """Counts a failure, opening the breaker at the threshold."""
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.trip(f"{self.failures} consecutive failures")
+
+    def trip(self, reason: str) -> None:
+        """
+        Opens the breaker, whatever the failure count.
+        """
+        if self.is_open():
+            return
+        cooldown = min(self.cooldown * 2 ** self.trips, self.max_cooldown)
+        self.open_until = time.monotonic() + cooldown
+        self.trips += 1
+        metrics.inc("breaker_trips")
+        # Half-open after the cooldown: the next failure trips it again
+        self.failures = self.threshold - 1
+        logger.warning(f"Circuit breaker open for {cooldown}s ({reason}), polling paused.")
+
+    async def wait_closed(self) -> None:
+        """
+        Waits until the breaker is no longer open.
+        """
+        while self.is_open():
+            await asyncio.sleep(self.remaining)
+
+class SessionRecovery:
+    """
+    Brings a misbehaving session back to the booking page with cheap-first escalation:
+    re-resolve the cached elements, then refresh the page (skipped on a cancellation or
+    confirmation page, whose reload would replay it), then re-navigate from the main
+    page. When all of them fail the caller replaces the driver (the last step).
+    Consecutive failed recoveries back off exponentially, and an access denied redirect
+    trips the circuit breaker instead of insisting.
+    """
+    # Each step returns True if the session is back on the booking page
+    STEPS = {
+        RecoveryStep.RERESOLVE: _reresolve_elements,
+        RecoveryStep.REFRESH: BrowserSession.refresh_booking_page,
+        RecoveryStep.RENAVIGATE: BrowserSession.open_bookings_page,
+    }
+
+    def __init__(self, governor: RequestGovernor, breaker: CircuitBreaker):
+        """
+        Args:
+            governor (RequestGovernor): The governor page loads go through.
+            breaker (CircuitBreaker): The breaker informed of the recovery outcome.
+        """
+        self.governor = governor
+        self.breaker = breaker
+        self.consecutive_failures = 0
+
+    async def recover(self, session: BrowserSession) -> bool:
+        """
+        Runs the recovery steps on a session until one brings it back to the booking page.
+        Returns:
+            bool: True if the session is usable again, False if it needs a new driver.
+        """
+        if self.consecutive_failures:
+            delay = min(RECOVERY_BACKOFF_BASE * 2 ** (self.consecutive_failures - 1), RECOVERY_BACKOFF_MAX)
+            logger.info(f"Backing off {delay}s before recovering {session.name}.")
+            await asyncio.sleep(delay)
+        await self.breaker.wait_closed()
+
+        if await session.run(session.is_alive):
+            for step, func in self.STEPS.items():
+                if step == RecoveryStep.REFRESH and await session.run(_is_on_replaying_page, session):
+                    continue
+                if step != RecoveryStep.RERESOLVE:
+                    await self.governor.acquire(RequestCategory.REFRESH)
+                try:
+                    recovered = await session.run(func, session)
+                except Exception as e:
+                    logger.warning(f"Recovery step '{step.value}' raised on {session.name}: {e}")
+                    recovered = False
+                if await session.run(session.is_access_denied):
+                    self.breaker.trip("access denied redirect")
+                    break
+                if recovered:
+                    logger.info(f"{session.name} recovered with step '{step.value}'.")
+                    metrics.inc("recoveries", step=step.name.lower())
+                    self.consecutive_failures = 0
+                    return True
+
+        logger.warning(f"{session.name} could not be recovered, escalating to '{RecoveryStep.NEW_DRIVER.value}'.")
+        self.consecutive_failures += 1
+        metrics.inc("recoveries", step=RecoveryStep.NEW_DRIVER.name.lower())
+        self.breaker.record_failure()
+        return False
@@ -0,0 +1,67 @@
+# src/gaiola/registry.py
+from typing import Iterator
+
+from src.gaiola.models import Watch, WatchKey
+
+class WatchRegistry:
+    """
+    The active watches, indexed by identity (chat, people, dates, turni), by short id
+    and by chat, so lookups, duplicate checks and per-chat listings never scan the
+    whole set. Insertion order is kept, so watches are served first come, first served.
+    """
+    def __init__(self):
+        self._by_key: dict[WatchKey, Watch] = {}
+        self._by_id: dict[str, Watch] = {}
+        self._by_chat: dict[int, dict[WatchKey, Watch]] = {}
+
+    def add(self, watch: Watch) -> bool:
+        """
+        Registers a watch.
+        Returns:
+            bool: False if an identical watch is already registered (the new one is dropped).
+        """
+        key = watch.key
+        if key in self._by_key:
+            return False
+        self._by_key[key] = watch
+        self._by_id[watch.watch_id] = watch
+        self._by_chat.setdefault(watch.chat_id, {})[key] = watch
+        return True
+
+    def remove(self, watch: Watch) -> bool:
+        """
+        Unregisters a watch.
+        Returns:
+            bool: False if the watch was not registered.
+        """
+        key = watch.key
+        if self._by_key.get(key) is not watch:
+            return False
+        del self._by_key[key]
+        del self._by_id[watch.watch_id]
+        chat_watches = self._by_chat[watch.chat_id]
+        del chat_watches[key]
+        if not chat_watches:
+            del self._by_chat[watch.chat_id]
+        return True
+
+    def get(self, key: WatchKey) -> Watch | None:
+        return self._by_key.get(key)
+
+    def by_id(self, watch_id: str) -> Watch | None:
+        return self._by_id.get(watch_id)
+
+    def for_chat(self, chat_id: int) -> list[Watch]:
+        """
+        Returns the watches of a chat, oldest first.
+        """
+        return list(self._by_chat.get(chat_id, {}).values())
+
+    def __contains__(self, watch: Watch) -> bool:
+        return self._by_key.get(watch.key) is watch
+
+    def __iter__(self) -> Iterator[Watch]:
+        return iter(list(self._by_key.values()))
+
+    def __len__(self) -> int:
+        return len(self._by_key)
@@ -0,0 +1,135 @@
+# src/gaiola/selector_cache.py
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# Candidate selectors of the "PRENOTA QUI" button on the landing page, preferred first.
+# ":contains('...')" is not CSS, it is emulated by RACE_SELECTORS_SCRIPT with a text match.
+PRENOTA_SELECTORS = [
+    ".StylableButton2545352419__root",
+    "[data-testid='linkElement']",
+    "a[href*='booking']",
+    "button:contains('PRENOTA')",
+    ".booking-button",
+]
+
+# Milliseconds the first candidate selector gets on its own before the fallbacks are
+# considered, so a generic fallback does not beat a preferred button that renders late
+PREFERRED_HEAD_START_MS = 2000
+
+# Polls the page for all candidate selectors at once and resolves with the first one
+# (in the given order) that matches, instead of waiting for each selector in turn.
+# During the first headStartMs only the first selector is looked for.
+# Arguments: selectors, head start in ms, timeout in ms. Resolves with {index, element} or null.
+RACE_SELECTORS_SCRIPT = """
+const [selectors, headStartMs, timeoutMs] = arguments;
+const done = arguments[arguments.length - 1];
+const find = (selector) => {
+    const contains = selector.match(/^(.*):contains\\(['"](.*)['"]\\)$/);
+    try {
+        if (!contains) return document.querySelector(selector);
+        return Array.from(document.querySelectorAll(contains[1] || '*'))
+            .find(el => (el.textContent || '').includes(contains[2])) || null;
+    } catch (e) {
+        return null; // Invalid selector
+    }
+};
+const started = Date.now();
+const poll = () => {
+    const candidates = Date.now() - started < headStartMs ? 1 : selectors.length;
+    for (let i = 0; i < candidates; i++) {
+        const element = find(selectors[i]);
+        if (element) return done({index: i, element: element});
+    }
+    if (Date.now() - started > timeoutMs) return done(null);
+    setTimeout(poll, 100);
+};
+poll();
+"""
+
+class SelectorCache:
+    """
+    Remembers which candidate selector last found an element, persisted to a JSON file,
+    so it is tried first on the next search and across restarts.
+    Every `revalidate_after` the candidates are tried in their original order again,
+    so a fallback selector does not stick once the preferred one works again.
+    """
+    def __init__(self, path: str, candidates: list[str], revalidate_after: timedelta):
+        """
+        Args:
+            path (str): Path of the JSON file the cache is persisted to.
+            candidates (list[str]): The candidate selectors, preferred first.
+            revalidate_after (timedelta): How long a remembered selector is trusted.
+        """
+        self.path = path
+        self.candidates = candidates
+        self.revalidate_after = revalidate_after
+        self.selector: str | None = None
+        self.validated_at: datetime | None = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as json_file:
+                data = json.load(json_file)
+            if data["selector"] in self.candidates:
+                self.selector = data["selector"]
+                self.validated_at = datetime.fromisoformat(data["validated_at"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable selector cache {self.path}: {e}")
+
+    def _save(self) -> None:
+        try:
+            with open(self.path, 'w') as json_file:
+                json.dump({"selector": self.selector, "validated_at": self.validated_at.isoformat()}, json_file)
+        except OSError as e:
+            logger.warning(f"Could not save selector cache {self.path}: {e}")
+
+    def is_stale(self) -> bool:
+        """Whether the remembered selector is due for re-validation."""
+        return self.validated_at is None or datetime.now() - self.validated_at > self.revalidate_after
+
+    def ordered(self) -> list[str]:
+        """
+        Returns the candidates in the order they should be tried: the remembered
+        selector first, unless it is due for re-validation.
+        """
+        with self._lock:
+            if self.selector is None or self.is_stale():
+                return list(self.candidates)
+            return [self.selector] + [c for c in self.candidates if c != self.selector]
+
+    def record(self, selector: str) -> None:
+        """
+        Records the selector that found the element, persisting it if it changed
+        or if this search was a re-validation. Only call it once the element proved
+        to be the right one (e.g. clicking it reached the expected page).
+        """
+        with self._lock:
+            if selector == self.selector and not self.is_stale():
+                return
+            if selector != self.selector:
+                logger.info(f"Selector cache now prefers {selector!r} (was {self.selector!r}).")
+            self.selector = selector
+            self.validated_at = datetime.now()
+            self._save()
+
+_caches: dict[str, SelectorCache] = {}
+_caches_lock = threading.Lock()
+
+def get_prenota_selector_cache(path: str, revalidate_after: timedelta) -> SelectorCache:
+    """
+    Returns the PRENOTA button selector cache for the given file, shared by every
+    session of the process.
+    """
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = SelectorCache(path, PRENOTA_SELECTORS, revalidate_after)
+        return _caches[path]
@@ -0,0 +1,891 @@
+# src/gaiola/session.py
+import logging
+from datetime import date, timedelta
+import os
+import random
+from time import monotonic, sleep
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.firefox.options import Options
+from selenium.webdriver.firefox.service import Service
+from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+from src.gaiola.element_cache import ElementCache, Locator
+from src.gaiola.executor import DriverExecutor
+from src.gaiola.lean_profile import lean_prefs, process_tree_rss_kb
+from src.gaiola.models import Turno
+from src.gaiola.selector_cache import PREFERRED_HEAD_START_MS, RACE_SELECTORS_SCRIPT, get_prenota_selector_cache
+from src.gaiola.session_state import (
+    READ_LOCAL_STORAGE_SCRIPT, WRITE_LOCAL_STORAGE_SCRIPT, SavedSessionState, get_session_state_store
+)
+from src.utils.config import Config
+from src.utils.metrics import metrics
+from src.data.people_data import Person # Import Person for type hinting
+
+logger = logging.getLogger(__name__)
+
+# Labels of the turno radio buttons on the booking widget
+TURNO_RADIO_LABELS = {
+    Turno.MATTINO: "[for='904_turno_1']",
+    Turno.POMERIGGIO: "[for='904_turno_2']",
+}
+
+def day_button_locator(date_str: str) -> Locator:
+    """
+    Returns the locator of the date button showing the given date.
+    """
+    return (By.XPATH, f"//*[contains(@class, 'bottoni_data_904') and normalize-space(text())='{date_str}']")
+
+# Returns text, classes, index and element of every date button in one round-trip
+DAYS_SNAPSHOT_SCRIPT = """
+return Array.from(document.getElementsByClassName('bottoni_data_904')).map((btn, idx) => ({
+    text: (btn.innerText || btn.textContent || '').trim(),
+    classes: btn.className,
+    index: idx,
+    element: btn
+}));
+"""
+
+# Selects a date, toggles both turno radios and reads #disponibilita_effettiva after each,
+# waiting for the widget to re-render it (MutationObserver) instead of fixed sleeps.
+# Arguments: date text, turno label selectors, per-step timeout in ms, callback.
+READ_AVAILABILITY_SCRIPT = """
+const [dateText, turnoLabels, timeoutMs] = arguments;
+const done = arguments[arguments.length - 1];
+const target = () => document.getElementById('disponibilita_effettiva');
+
+function clickAndWait(element) {
+    return new Promise((resolve) => {
+        let finished = false;
+        const finish = () => {
+            if (finished) return;
+            finished = true;
+            observer.disconnect();
+            clearTimeout(timer);
+            resolve();
+        };
+        const observer = new MutationObserver((mutations) => {
+            const current = target();
+            if (!current || mutations.some(m => current === m.target || current.contains(m.target) || m.target.contains(current))) {
+                finish();
+            }
+        });
+        observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+        const timer = setTimeout(finish, timeoutMs);
+        element.click();
+    });
+}
+
+function readCount() {
+    const element = target();
+    const parts = element ? (element.innerText || element.textContent || '').split(':') : [];
+    return parts.length > 1 ? parseInt(parts[1].trim(), 10) : null;
+}
+
+(async () => {
+    const dateButton = Array.from(document.getElementsByClassName('bottoni_data_904'))
+        .find(btn => (btn.innerText || btn.textContent || '').trim() === dateText);
+    if (!dateButton) {
+        return {error: 'date button not found: ' + dateText};
+    }
+    dateButton.scrollIntoView(true);
+    await clickAndWait(dateButton);
+    const counts = [];
+    for (const selector of turnoLabels) {
+        const label = document.querySelector(selector);
+        if (!label) {
+            return {error: 'turno label not found: ' + selector};
+        }
+        await clickAndWait(label);
+        counts.push(readCount());
+    }
+    return {counts: counts};
+})().then(done, (e) => done({error: String(e)}));
+"""
+
+# Milliseconds to wait for the availability to re-render after each click
+READ_AVAILABILITY_STEP_TIMEOUT = 1500
+
+# Fills the whole booking form in one call. Plain inputs and native selects are set
+# through the native value setter followed by input/change events (and a jQuery change,
+# which the site's validation listens to); Select2 widgets are set on their underlying
+# <select> when an option matching the search text is already loaded; checkboxes are
+# clicked. Arguments: {id: value} inputs, {id: search text} Select2 fields, checkbox ids.
+# Returns the ids that could not be set, and the Select2 fields left for native interaction.
+BULK_FILL_SCRIPT = """
+const [inputs, select2Fields, checkboxes, firstOnTie] = arguments;
+const missing = [];
+const pending = [];
+const fire = (el) => {
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+    if (window.jQuery) window.jQuery(el).trigger('change');
+};
+const ambiguous = {};
+// Same ranking as option_match_score(): exact text or value, then prefix, then (if partial) substring
+const score = (o, text, partial) => {
+    const optionText = o.text.trim().toLowerCase();
+    if (o.value.toLowerCase() === text || optionText === text) return 3;
+    if (optionText.startsWith(text)) return 2;
+    if (partial && optionText.includes(text)) return 1;
+    return 0;
+};
+// Selects the single best matching option: 'ok', 'none', or 'ambiguous' (recorded) on a tie,
+// unless the field takes the first of the tied options
+const chooseOption = (select, id, wanted, partial) => {
+    const text = wanted.toLowerCase();
+    const scored = Array.from(select.options).map(o => [score(o, text, partial), o]);
+    const best = Math.max(0, ...scored.map(([s]) => s));
+    if (best === 0) return 'none';
+    const candidates = scored.filter(([s]) => s === best).map(([, o]) => o);
+    if (candidates.length > 1 && !firstOnTie.includes(id)) {
+        ambiguous[id] = candidates.map(o => o.text.trim());
+        return 'ambiguous';
+    }
+    select.value = candidates[0].value;
+    return 'ok';
+};
+for (const [id, value] of Object.entries(inputs)) {
+    const el = document.getElementById(id);
+    if (!el) { missing.push(id); continue; }
+    if (el.tagName === 'SELECT') {
+        const status = chooseOption(el, id, value, false);
+        if (status === 'none') missing.push(id);
+        if (status !== 'ok') continue;
+    } else {
+        const proto = el.tagName === 'TEXTAREA' ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+        Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, value);
+    }
+    fire(el);
+}
+for (const [id, value] of Object.entries(select2Fields)) {
+    const el = document.getElementById(id);
+    const status = el ? chooseOption(el, id, value, true) : 'none';
+    if (status === 'none') pending.push(id);
+    if (status !== 'ok') continue;
+    fire(el);
+}
+for (const id of checkboxes) {
+    const el = document.getElementById(id);
+    if (!el) { missing.push(id); continue; }
+    if (!el.checked) el.click();
+}
+return {missing: missing, pending: pending, ambiguous: ambiguous};
+"""
+
+def option_match_score(option_text: str, wanted: str, partial: bool = True) -> int:
+    """
+    Ranks how well a dropdown option matches the wanted text (case-insensitive):
+    3 for the exact text, 2 for a prefix, 1 for a substring (only if `partial`), 0 otherwise.
+    Exact matches come first so "NAPOLI" never picks e.g. "CASALNUOVO DI NAPOLI".
+    """
+    option_text, wanted = option_text.strip().lower(), wanted.lower()
+    if option_text == wanted:
+        return 3
+    if option_text.startswith(wanted):
+        return 2
+    if partial and wanted in option_text:
+        return 1
+    return 0
+
+def best_option(option_texts: list[str], wanted: str, partial: bool = True, first_on_tie: bool = False) -> int | None:
+    """
+    Returns the index of the single best matching option, None if nothing matches.
+    With `first_on_tie`, the first of several equally good options is taken.
+    Raises:
+        ValueError: If several options match equally well (and not `first_on_tie`).
+    """
+    scores = [option_match_score(t, wanted, partial) for t in option_texts]
+    best = max(scores, default=0)
+    if best == 0:
+        return None
+    candidates = [idx for idx, score in enumerate(scores) if score == best]
+    if len(candidates) > 1 and not first_on_tie:
+        raise ValueError(f"Ambiguous option '{wanted}': {[option_texts[idx].strip() for idx in candidates]}")
+    return candidates[0]
+
+def booking_form_fields(people: list[Person], email: str, tel: str,
+                        municipalita: str = "") -> tuple[dict[str, str], dict[str, str], list[str], list[str]]:
+    """
+    Returns the booking form content for the given people: plain field values by id,
+    Select2 search texts by id (in cascade order), the checkboxes to tick and the
+    Select2 fields that take the first of several equally good options.
+    Without a configured `municipalita`, the municipalità is searched as "muni" and the
+    first result is taken, as every "Municipalità N - ..." option matches it.
+    """
+    inputs: dict[str, str] = {}
+    select2_fields: dict[str, str] = {}
+    first_on_tie: list[str] = []
+    for idx, p in enumerate(people):
+        form_idx = idx + 1 # Form fields are 1-indexed
+        inputs.update({
+            f"nome_{form_idx}": p.name,
+            f"cognome_{form_idx}": p.surname,
+            f"sesso_{form_idx}": p.sex,
+            f"data_nascita_{form_idx}": p.bday,
+            f"codice_fiscale_{form_idx}": p.cf,
+            f"email_{form_idx}": email,
+        })
+        select2_fields.update({
+            f"comune_nascita_{form_idx}": "NAPOLI",
+            f"stato_residenza_{form_idx}": "Italia",
+            f"provincia_residenza_{form_idx}": "Napoli",
+            f"municipalita_{form_idx}": municipalita or "muni",
+        })
+        if not municipalita:
+            first_on_tie.append(f"municipalita_{form_idx}")
+    inputs.update({"email_main": email, "email_main2": email, "telefono": tel})
+    return inputs, select2_fields, ["privacy", "regolamento"], first_on_tie
+
+class BrowserSession:
+    """
+    A single Selenium WebDriver session on the Gaiola booking website.
+    Encapsulates WebDriver setup, navigation, page interaction and the booking form.
+    Every call to the driver must go through the session's own executor thread.
+    """
+    def __init__(self, config: Config, name: str = "session"):
+        """
+        Initializes the session. The WebDriver itself is created by start(),
+        which must run on the session's executor.
+        Args:
+            config (Config): The application configuration object.
+            name (str): Name of the session, used for its worker thread and in logs.
+        """
+        self.config = config
+        self.name = name
+        self.custom_user_agent = os.getenv('CUSTOM_USER_AGENT', 'Mozilla/5.0 (X11; Linux x86_64; rv:137.0) Gecko/20100101 Firefox/137.0')
+        self.executor = DriverExecutor(name)
+        self.driver = None
+        self.elements: ElementCache | None = None
+        self.uses = 0
+        # Lifecycle figures, see DriverLifecycle
+        self.started_at: float | None = None
+        self.navigations = 0
+        self.loaded_on: date | None = None
+        self.prenota_selectors = get_prenota_selector_cache(
+            config.SELECTOR_CACHE_FILE, timedelta(hours=config.SELECTOR_REVALIDATE_HOURS)
+        )
+        # Selector of the last PRENOTA button found, recorded once it led to the booking page
+        self.prenota_selector: str | None = None
+        self.state_store = get_session_state_store(
+            config.SESSION_STATE_FILE, timedelta(hours=config.SESSION_STATE_MAX_AGE_HOURS)
+        )
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Runs a blocking function on the session's executor and awaits its result.
+        """
+        return await self.executor.run(func, *args, **kwargs)
+
+    def start(self) -> bool:
+        """
+        Creates the WebDriver and opens the booking page.
+        Returns:
+            bool: True if the booking page was opened successfully.
+        """
+        self.driver = self._get_driver()
+        self.elements = ElementCache(self.driver)
+        self.started_at = monotonic()
+        self.navigations = 0
+        return self.open_bookings_page()
+
+    def reload(self) -> None:
+        """
+        Refreshes the current page.
+        """
+        self.driver.refresh()
+        self.navigations += 1
+        self.elements.invalidate()
+        self.loaded_on = date.today()
+
+    def is_alive(self) -> bool:
+        """
+        Checks whether the browser still answers WebDriver commands.
+        """
+        try:
+            self.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def is_on_booking_page(self) -> bool:
+        """
+        Checks whether the session is parked on the booking page, i.e. the date
+        buttons of the booking widget are present.
+        """
+        try:
+            return bool(self.driver.find_elements(By.CLASS_NAME, "bottoni_data_904"))
+        except Exception:
+            return False
+
+    def browser_rss_kb(self) -> int | None:
+        """
+        Returns the resident memory of the browser and its content processes, in KB,
+        or None if the browser does not run on this machine. With a remote driver
+        (Selenium grid) the reported PID belongs to the grid host, so RSS-based
+        recycling is disabled there.
+        """
+        if not isinstance(self.driver, webdriver.Firefox):
+            return None
+        pid = self.driver.capabilities.get("moz:processID")
+        return process_tree_rss_kb(pid) if pid else None
+
+    def is_access_denied(self) -> bool:
+        """
+        Checks whether the site redirected the session to its access denied page.
+        """
+        try:
+            url = self.driver.current_url.lower()
+        except Exception:
+            return False
+        return "accesso" in url and "non consentito" in url
+
+    def refresh_booking_page(self, timeout: int = 10) -> bool:
+        """
+        Reloads the current page and waits for the date buttons of the booking widget.
+        Much cheaper than open_bookings_page(), but only useful while the session
+        is still on the booking site.
+        Returns:
+            bool: True if the booking page is back.
+        """
+        self.reload()
+        return self.wait_for_element(By.CLASS_NAME, "bottoni_data_904", timeout) is not None
+
+    def quit(self) -> None:
+        """
+        Quits the browser. Errors are ignored since the session is being discarded.
+        """
+        try:
+            if self.driver:
+                self.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting driver of {self.name}: {e}")
+
+    def _get_driver(self):
+        """
+        Initializes and returns the Selenium WebDriver based on the platform.
+        Uses headless mode for Raspberry Pi.
+        """
+        options = Options()
+        if self.config.IS_RASPBERRY_PI:
+            options.headless = True  # Run in headless mode for RPi
+
+        prefs = {
+            # Disable automation indicators
+            "dom.webdriver.enabled": False,
+            "useAutomationExtension": False,
+            
+            # Disable navigator.webdriver property
+            "dom.webdriver.enabled": False,
+            
+            # Images, CSS and other resources are blocked by the lean profile (Config.LEAN_PROFILE)
+            
+            # Disable notifications
+            "dom.push.enabled": False,
+            "dom.push.userAgentID": "",
+            
+            # Disable geolocation
+            "geo.enabled": False,
+            
+            # Disable WebRTC
+            "media.peerconnection.enabled": False,
+            
+            # Set language
+            "intl.accept_languages": "en-US,en;q=0.9",
+            
+            # Disable automation flags
+            "marionette": False,
+            "dom.disable_beforeunload": True,
+        }
+        if self.config.LEAN_PROFILE:
+            prefs.update(lean_prefs(self.config))
+    
+        # Apply preferences
+        for key, value in prefs.items():
+            try:
+                options.set_preference(key, value)
+            except Exception as e:
+                logger.warning(f"Could not set preference {key}: {e}")
+
+        # Set custom User-Agent
+        options.set_preference("general.useragent.override", self.custom_user_agent)
+        logger.info(f"Setting User-Agent to: {self.custom_user_agent}")
+        
+        if self.config.IS_RASPBERRY_PI:
+            selenium_host = os.getenv('SELENIUM_REMOTE_HOST', 'localhost')
+            selenium_url = f"http://{selenium_host}:4444"
+
+            driver = webdriver.Remote(
+                command_executor=selenium_url,
+                options=options
+            )
+        else:
+            service = Service(executable_path='/usr/local/bin/geckodriver') if self.config.IS_RASPBERRY_PI else None
+            driver = webdriver.Firefox(options=options, service=service)
+        
+        # Execute JavaScript to remove webdriver property
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        
+        # Add some randomness to viewport size
+        if not self.config.IS_RASPBERRY_PI:
+            width = random.randint(1200, 1920)
+            height = random.randint(800, 1080)
+            driver.set_window_size(width, height)
+        
+        return driver
+
+
+    def human_like_delay(self, min_delay=0.5, max_delay=2.0):
+        """Generate human-like random delays"""
+        delay = random.uniform(min_delay, max_delay)
+        sleep(delay)
+
+    def human_like_scroll(self, element=None):
+        """Simulate human-like scrolling"""
+        if element:
+            # Scroll to element with random offset
+            self.driver.execute_script(
+                "arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", 
+                element
+            )
+        else:
+            # Random scroll
+            scroll_amount = random.randint(100, 500)
+            self.driver.execute_script(f"window.scrollBy(0, {scroll_amount});")
+        
+        self.human_like_delay(0.5, 1.5)
+
+    def human_like_mouse_movement(self, element):
+        """Simulate human-like mouse movement to element"""
+        actions = ActionChains(self.driver)
+        
+        # Move to a random point near the element first
+        actions.move_to_element_with_offset(element, 
+                                        random.randint(-10, 10), 
+                                        random.randint(-10, 10))
+        actions.perform()
+        self.human_like_delay(0.1, 0.3)
+        
+        # Then move to the actual element
+        actions.move_to_element(element)
+        actions.perform()
+        self.human_like_delay(0.2, 0.5)
+
+    def wait_for_element(self, by, value, timeout=10):
+        """Wait for element with timeout"""
+        try:
+            element = WebDriverWait(self.driver, timeout).until(
+                EC.presence_of_element_located((by, value))
+            )
+            return element
+        except TimeoutException:
+            logger.warning(f"Element not found within {timeout} seconds: {value}")
+            return None
+
+    def safe_click(self, element, use_js=False):
+        """Safely click an element with human-like behavior"""
+        try:
+            # Scroll to element
+            self.human_like_scroll(element)
+            
+            # Wait a bit
+            self.human_like_delay(0.5, 1.0)
+            
+            # Move mouse to element
+            self.human_like_mouse_movement(element)
+            
+            # Wait for element to be clickable
+            WebDriverWait(self.driver, 10).until(EC.element_to_be_clickable(element))
+            
+            if use_js:
+                # Use JavaScript click as fallback
+                self.driver.execute_script("arguments[0].click();", element)
+            else:
+                # Try normal click first
+                element.click()
+            
+            # Wait after click
+            self.human_like_delay(1.0, 2.0)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error clicking element: {e}")
+            if not use_js:
+                # Retry with JavaScript click
+                return self.safe_click(element, use_js=True)
+            return False
+
+    @metrics.timed("page_open")
+    def open_bookings_page(self):
+        """
+        Opens the Gaiola booking page: straight to the booking URL with the saved browser
+        state if there is a valid one, otherwise through the landing page flow, whose
+        resulting state is then saved for the next time.
+        """
+        self.elements.invalidate()
+        self.navigations += 1
+        if self.restore_state():
+            self.loaded_on = date.today()
+            return True
+        if not self._open_via_landing_page():
+            return False
+        if self.is_on_booking_page():
+            if self.prenota_selector:
+                self.prenota_selectors.record(self.prenota_selector)
+            self.save_state()
+        self.loaded_on = date.today()
+        return True
+
+    def restore_state(self) -> bool:
+        """
+        Restores the saved cookies and localStorage and goes straight to the saved
+        booking URL. The saved state is dropped if the booking page does not come up.
+        Returns:
+            bool: True if the session is on the booking page.
+        """
+        state = self.state_store.load()
+        if not state:
+            return False
+        try:
+            logger.info("Restoring saved session state...")
+            # Cookies and localStorage can only be set on a page of their own origin
+            self.driver.get(state.url)
+            for cookie in state.cookies:
+                try:
+                    self.driver.add_cookie(cookie)
+                except Exception as e:
+                    logger.debug(f"Skipping cookie {cookie.get('name')}: {e}")
+            if state.local_storage:
+                self.driver.execute_script(WRITE_LOCAL_STORAGE_SCRIPT, state.local_storage)
+            self.driver.refresh()
+            if not self.is_access_denied() and self.wait_for_element(By.CLASS_NAME, "bottoni_data_904", 10) is not None:
+                logger.info(f"Restored session state, on {self.driver.current_url}")
+                return True
+        except Exception as e:
+            logger.warning(f"Error restoring session state: {e}")
+        logger.info("Saved session state did not validate, falling back to the landing page.")
+        self.state_store.clear()
+        return False
+
+    def save_state(self) -> None:
+        """
+        Saves the cookies, localStorage and URL of the booking page for restore_state().
+        """
+        try:
+            self.state_store.save(SavedSessionState(
+                url=self.driver.current_url,
+                cookies=self.driver.get_cookies(),
+                local_storage=self.driver.execute_script(READ_LOCAL_STORAGE_SCRIPT),
+            ))
+        except Exception as e:
+            logger.warning(f"Could not save session state: {e}")
+
+    def _open_via_landing_page(self) -> bool:
+        """
+        Navigates to the Gaiola booking page from the landing page and handles initial pop-ups/windows.
+        """
+        try:
+            # Navigate to the main page first
+            logger.info("Navigating to main page...")
+            self.driver.get("https://www.areamarinaprotettagaiola.it/prenotazione/")
+            
+            # Wait for page to load
+            self.human_like_delay(2, 4)
+            
+            # Handle cookies banner
+            try:
+                cookies_button = self.wait_for_element(By.CSS_SELECTOR, '[data-hook="consent-banner-close-button"]', 5) 
+                if cookies_button:
+                    logger.info("Closing cookies banner...")
+                    self.safe_click(cookies_button)
+            except Exception as e:
+                logger.info(f"No cookie banner found: {e}")
+            
+            # Wait and do some human-like browsing behavior
+            self.human_like_delay(2, 4)
+            
+            # Random scroll to simulate reading
+            for _ in range(random.randint(1, 3)):
+                self.human_like_scroll()
+                self.human_like_delay(1, 2)
+            
+            # Find and click the "PRENOTA QUI" button
+            prenota_button = self.find_prenota_button()
+            if not prenota_button:
+                logger.error("Could not find PRENOTA QUI button")
+                return False
+            
+            # Scroll to button area and wait
+            self.human_like_scroll(prenota_button)
+            self.human_like_delay(1, 3)
+            
+            # Click the button
+            logger.info("Clicking PRENOTA QUI button...")
+            if not self.safe_click(prenota_button):
+                logger.error("Failed to click PRENOTA button")
+                return False
+            
+            # Handle window switching if new window opens
+            original_window = self.driver.current_window_handle
+            self.human_like_delay(2, 4)  # Wait for potential new window
+            
+            # Check if new window opened
+            if len(self.driver.window_handles) > 1:
+                for window_handle in self.driver.window_handles:
+                    if window_handle != original_window:
+                        self.driver.switch_to.window(window_handle)
+                        logger.info("Switched to new window")
+                        break
+            
+            # Wait for new page to load
+            self.human_like_delay(2, 4)
+            
+            logger.info(f"Current URL after navigation: {self.driver.current_url}")
+            
+            # Check if we got redirected to an access denied page
+            if self.is_access_denied():
+                logger.error("Got redirected to access denied page")
+                return False
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error in open_bookings_page_enhanced: {e}")
+            return False
+
+    @metrics.timed("prenota_search")
+    def find_prenota_button(self, timeout: int = 10):
+        """
+        Looks for the "PRENOTA QUI" button with all candidate selectors at once, in a
+        single script call, the cached selector first (and alone for a short head start).
+        The winning selector is only recorded in the cache by open_bookings_page(), once
+        the click reached the booking page.
+        Returns:
+            WebElement | None: The button, or None if no selector matched within the timeout.
+        """
+        selectors = self.prenota_selectors.ordered()
+        self.prenota_selector = None
+        result = self.driver.execute_async_script(RACE_SELECTORS_SCRIPT, selectors, PREFERRED_HEAD_START_MS, timeout * 1000)
+        if not result:
+            return None
+        self.prenota_selector = selectors[result['index']]
+        logger.info(f"Found PRENOTA button with selector: {self.prenota_selector}")
+        return result['element']
+
+    @metrics.timed("days_snapshot")
+    def snapshot_days(self) -> list[dict]:
+        """
+        Takes a compact snapshot of every date button with a single script call,
+        instead of one WebDriver round-trip per button and attribute.
+        Returns:
+            list[dict]: One entry per button with its text, classes and index.
+        """
+        try:
+            snapshot = self.driver.execute_script(DAYS_SNAPSHOT_SCRIPT)
+        except Exception as e:
+            logger.error(f"Error getting days snapshot: {e}")
+            return []
+        # Keep the elements in this session's cache, the snapshot itself only holds locators
+        for entry in snapshot:
+            self.elements.put(day_button_locator(entry['text']), entry.pop('element'))
+        return snapshot
+
+    def _scroll_and_click(self, element) -> None:
+        self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
+        element.click()
+
+    @metrics.timed("date_click")
+    def click_day(self, date_str: str) -> None:
+        """Scrolls to and clicks the button of the given date on this session's page."""
+        self.elements.act(day_button_locator(date_str), self._scroll_and_click)
+
+    @metrics.timed("turno_click")
+    def click_turno(self, turno: Turno) -> None:
+        """Clicks the radio button label of the given turno."""
+        self.elements.act((By.CSS_SELECTOR, TURNO_RADIO_LABELS[turno]), lambda el: el.click())
+
+    def capture_widget_requests(self, date_str: str, turno: Turno) -> list[str]:
+        """
+        Selects a date and turno and returns the URLs of the XHR/fetch requests the
+        widget made meanwhile, read from the Resource Timing API (used to discover the
+        endpoint replayed by the http probe).
+        """
+        self.driver.execute_script("performance.clearResourceTimings();")
+        self.click_day(date_str)
+        sleep(0.5)
+        self.click_turno(turno)
+        sleep(1.5)
+        return self.driver.execute_script(
+            "return performance.getEntriesByType('resource')"
+            ".filter(e => e.initiatorType === 'xmlhttprequest' || e.initiatorType === 'fetch')"
+            ".map(e => e.name);"
+        )
+
+    @metrics.timed("turno_read")
+    def read_disponibilita(self) -> int:
+        """Reads the number of available spots shown for the selected date and turno."""
+        text = self.elements.act((By.ID, "disponibilita_effettiva"), lambda el: el.text)
+        return int(text.split(":")[1].strip())
+
+    @metrics.timed("day_read")
+    def read_day_availability(self, date_str: str) -> dict[Turno, int]:
+        """
+        Reads the availability of both turni for a date with a single injected script:
+        one WebDriver round-trip instead of a click, find and read call per step.
+        Args:
+            date_str (str): The date to read (dd/mm/YYYY).
+        Returns:
+            dict[Turno, int]: Available spots per turno.
+        Raises:
+            ValueError: If the script could not find the date or turno, or read a count.
+        """
+        turni = list(TURNO_RADIO_LABELS.keys())
+        result = self.driver.execute_async_script(
+            READ_AVAILABILITY_SCRIPT,
+            date_str,
+            [TURNO_RADIO_LABELS[t] for t in turni],
+            READ_AVAILABILITY_STEP_TIMEOUT,
+        )
+        if result.get('error'):
+            raise ValueError(f"Could not read availability for {date_str}: {result['error']}")
+        if None in result['counts']:
+            raise ValueError(f"Could not parse availability for {date_str}: {result['counts']}")
+        return dict(zip(turni, result['counts']))
+
+    def navigate(self, url: str) -> None:
+        """Navigates the session to the given URL."""
+        self.driver.get(url)
+        self.navigations += 1
+
+    def get_current_url(self) -> str:
+        """Returns the URL the driver is currently on."""
+        return self.driver.current_url
+
+    @metrics.timed("book")
+    def book(self, selected_people: list[Person], email: str, tel: str):
+        """
+        Fills out the booking form with the selected people's details and submits it.
+        All fields are set with a single script call; only the Select2 widgets whose
+        options are not loaded yet are driven natively.
+        Args:
+            selected_people (list[Person]): List of Person objects to book for.
+            email (str): The email address to use for booking.
+            tel (str): The phone number to use for booking.
+        """
+        logger.info(f"Attempting to book for: {[p.name for p in selected_people]}")
+        started = monotonic()
+        try:
+            # Click the "Prenota" (Book) button to proceed to the form
+            with metrics.timer("book_open_form"):
+                self.driver.find_element(By.ID, "CheckAvailability_904").click()
+                self.wait_for_element(By.ID, "nome_1", 5) # Wait for the form to load
+
+            self.fill_booking_form(selected_people, email, tel)
+            self._submit_booking(started)
+
+        except Exception as e:
+            logger.error(f"Error during booking process: {e}")
+            raise # Re-raise the exception to be caught by the caller (check_availability)
+
+    def _submit_booking(self, started: float) -> None:
+        """
+        Clicks the final confirmation button and waits for the booking to be processed.
+        Args:
+            started (float): monotonic() time the booking started at, for the time-to-submit.
+        """
+        with metrics.timer("book_submit"):
+            prenota_btn = self.driver.find_element(By.ID, "ConfermaPrenotazione")
+            self.driver.execute_script("arguments[0].scrollIntoView(true);", prenota_btn)
+            prenota_btn.click()
+        time_to_submit = monotonic() - started
+        metrics.observe("book_time_to_submit", time_to_submit)
+        logger.info(f"Booking confirmation button clicked, {time_to_submit:.2f}s after the booking started.")
+        sleep(3) # Wait for the booking to process and redirect
+
+    def stage_booking(self, date_str: str, turno: Turno, selected_people: list[Person], email: str, tel: str) -> bool:
+        """
+        Prepares a booking without submitting it: selects the date and turno and, if the
+        site lets the form open, fills it in. Only submit_staged_booking() is left to do.
+        Returns:
+            bool: True if the form is open and filled, False if only date and turno are selected
+                (the site may not open the form while the turno is full).
+        """
+        self.click_day(date_str)
+        self.click_turno(turno)
+        try:
+            self.driver.find_element(By.ID, "CheckAvailability_904").click()
+        except Exception as e:
+            logger.info(f"Booking form not available yet for {date_str} {turno.value}: {e}")
+            return False
+        if self.wait_for_element(By.ID, "nome_1", 3) is None:
+            return False
+        self.fill_booking_form(selected_people, email, tel)
+        return True
+
+    @metrics.timed("book_staged")
+    def submit_staged_booking(self, form_ready: bool, selected_people: list[Person], email: str, tel: str) -> None:
+        """
+        Submits a booking prepared by stage_booking(). The form is filled again with one
+        script call first, in case the site re-rendered it since; if it was never
+        opened, it is opened and filled now.
+        Args:
+            form_ready (bool): What stage_booking() returned.
+        """
+        started = monotonic()
+        if not form_ready:
+            self.driver.find_element(By.ID, "CheckAvailability_904").click()
+            self.wait_for_element(By.ID, "nome_1", 5)
+        self.fill_booking_form(selected_people, email, tel)
+        self._submit_booking(started)
+
+    def fill_booking_form(self, selected_people: list[Person], email: str, tel: str) -> None:
+        """
+        Fills the booking form with one bulk script call, then drives natively the
+        Select2 widgets the script could not set (e.g. options loaded on search).
+        """
+        inputs, select2_fields, checkboxes, first_on_tie = booking_form_fields(
+            selected_people, email, tel, self.config.MUNICIPALITA
+        )
+        with metrics.timer("book_fill"):
+            result = self.driver.execute_script(BULK_FILL_SCRIPT, inputs, select2_fields, checkboxes, first_on_tie)
+        if result['ambiguous']:
+            raise ValueError(f"Ambiguous booking form options: {result['ambiguous']}")
+        if result['missing']:
+            logger.warning(f"Booking form fields not found: {result['missing']}")
+        if result['pending']:
+            with metrics.timer("book_fill_native"):
+                for container_id in result['pending']:
+                    self._select2_dropdown(container_id, select2_fields[container_id], container_id in first_on_tie)
+        logger.info(f"Booking form filled, {len(result['pending'])} Select2 field(s) set natively.")
+
+    def _select2_dropdown(self, container_id: str, value: str, first_on_tie: bool = False):
+        """
+        Helper to interact with Select2 dropdowns: searches the value and clicks the
+        best matching result (see best_option) rather than the first one.
+        Raises:
+            ValueError: If several results match equally well (and not `first_on_tie`).
+        """
+        try:
+            container = self.driver.find_element(By.CSS_SELECTOR, f"[aria-labelledby=select2-{container_id}-container]")
+            self.driver.execute_script("arguments[0].scrollIntoView(true);", container)
+            container.click()
+            search_field = self.driver.find_element(By.CLASS_NAME, "select2-search__field")
+            search_field.send_keys(value)
+            # Wait for the (possibly remote) search results
+            results = WebDriverWait(self.driver, 5).until(lambda d: [
+                r for r in d.find_elements(By.CSS_SELECTOR, "li.select2-results__option")
+                if "loading-results" not in (r.get_attribute("class") or "")
+            ] or False)
+            idx = best_option([r.text for r in results], value, first_on_tie=first_on_tie)
+            if idx is None:
+                raise TimeoutException(f"no result matches '{value}'")
+            results[idx].click()
+            logger.debug(f"Selected '{results[idx].text}' in dropdown {container_id}.")
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.warning(f"Could not interact with Select2 dropdown {container_id} for value '{value}': {e}")
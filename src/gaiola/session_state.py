@@ -0,0 +1,108 @@
+# src/gaiola/session_state.py
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, asdict, field
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# Reads the whole localStorage of the current origin as a plain object
+READ_LOCAL_STORAGE_SCRIPT = """
+const items = {};
+for (let i = 0; i < window.localStorage.length; i++) {
+    const key = window.localStorage.key(i);
+    items[key] = window.localStorage.getItem(key);
+}
+return items;
+"""
+
+# Writes the given object into the localStorage of the current origin
+WRITE_LOCAL_STORAGE_SCRIPT = """
+const items = arguments[0];
+for (const [key, value] of Object.entries(items)) {
+    window.localStorage.setItem(key, value);
+}
+"""
+
+@dataclass
+class SavedSessionState:
+    """
+    Dataclass to represent the browser state of a session parked on the booking page.
+    """
+    url: str # Booking page URL reached at the end of the landing page flow
+    cookies: list[dict] = field(default_factory=list)
+    local_storage: dict[str, str] = field(default_factory=dict)
+    saved_at: str = "" # ISO timestamp
+
+class SessionStateStore:
+    """
+    Persists the browser state of the last successful booking page open to a JSON file,
+    so later sessions can restore it and go straight to the booking page.
+    """
+    def __init__(self, path: str, max_age: timedelta):
+        """
+        Args:
+            path (str): Path of the JSON file.
+            max_age (timedelta): Age after which a saved state is no longer restored.
+        """
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+
+    def load(self) -> SavedSessionState | None:
+        """
+        Returns the saved state, or None if there is none or it is too old.
+        """
+        with self._lock:
+            if not os.path.exists(self.path):
+                return None
+            try:
+                with open(self.path, 'r') as json_file:
+                    state = SavedSessionState(**json.load(json_file))
+                # A missing, malformed or timezone-aware timestamp (e.g. a legacy file) is unreadable too
+                age = datetime.now() - datetime.fromisoformat(state.saved_at)
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning(f"Ignoring unreadable session state {self.path}: {e}")
+                return None
+        if age > self.max_age:
+            logger.info("Saved session state is too old, not restoring it.")
+            return None
+        return state
+
+    def save(self, state: SavedSessionState) -> None:
+        """
+        Saves a state, replacing the previous one atomically.
+        """
+        state.saved_at = datetime.now().isoformat()
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            try:
+                with open(tmp_path, 'w') as json_file:
+                    json.dump(asdict(state), json_file)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Could not save session state {self.path}: {e}")
+
+    def clear(self) -> None:
+        """
+        Deletes the saved state, e.g. after it failed validation.
+        """
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+_stores: dict[str, SessionStateStore] = {}
+_stores_lock = threading.Lock()
+
+def get_session_state_store(path: str, max_age: timedelta) -> SessionStateStore:
+    """
+    Returns the session state store for the given file, shared by every session of the process.
+    """
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = SessionStateStore(path, max_age)
+        return _stores[path]
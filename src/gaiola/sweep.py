@@ -0,0 +1,239 @@
+# src/gaiola/sweep.py
+import asyncio
+import logging
+from datetime import date, datetime
+
+from telegram.ext import ContextTypes
+
+from src.data.booking_registry import BookedPerson
+from src.data.watch_store import WatchStore
+from src.gaiola.adaptive import AdaptiveScheduler, ReleaseEvent, ReleaseStats, STATS_WINDOW_DAYS
+from src.gaiola.models import Turno, Watch
+from src.gaiola.registry import WatchRegistry
+from src.gaiola.scraper import GaiolaScraper
+from src.utils.helpers import save_booking
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SWEEP_JOB_NAME = "availability_sweep"
+
+class AvailabilitySweep:
+    """
+    Central scheduler that checks availability for every active watch in one pass.
+    Once per tick the union of the watched dates is scraped exactly once and the
+    readings are fanned out to every subscribed watch, so scrape cost scales with
+    the number of distinct dates instead of the number of watches. Watches are kept
+    in a WatchRegistry, so subscribing the same watch twice is a no-op, and persisted
+    to a WatchStore, so they survive restarts.
+    With Config.ADAPTIVE_POLLING the sweep ticks at the minimum interval and an
+    AdaptiveScheduler picks which dates are due, based on observed release patterns.
+    With Config.PREARMED_BOOKING every subscribed watch gets a pre-armed booking session.
+    """
+    def __init__(self, scraper: GaiolaScraper):
+        """
+        Initializes the sweep with the scraper used to read the booking page.
+        Args:
+            scraper (GaiolaScraper): The scraper shared by all watches.
+        """
+        self.scraper = scraper
+        self.registry = WatchRegistry()
+        self.store = WatchStore(scraper.config.WATCHES_DB)
+        config = scraper.config
+        self.scheduler = None
+        if config.ADAPTIVE_POLLING:
+            # Seed the release statistics with the transitions recorded in previous runs
+            past_releases = [ReleaseEvent(r.date, r.turno, r.ts, r.count) for r in scraper.store.transitions(STATS_WINDOW_DAYS)]
+            logger.info(f"Loaded {len(past_releases)} past releases from the availability store.")
+            self.scheduler = AdaptiveScheduler(config, ReleaseStats(past_releases))
+        self.tick_interval = config.POLL_MIN_INTERVAL if self.scheduler else config.CHECK_INTERVAL
+        self.prearm = config.PREARMED_BOOKING
+        self._background: set[asyncio.Task] = set()
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    @property
+    def watches(self) -> list[Watch]:
+        """
+        Returns the active watches, oldest first.
+        """
+        return list(self.registry)
+
+    def subscribe(self, watch: Watch) -> bool:
+        """
+        Adds a watch to the next sweeps.
+        Returns:
+            bool: False if the same watch is already active.
+        """
+        if not self.registry.add(watch):
+            logger.info(f"Watch already active: {watch.name}")
+            return False
+        self.store.add(watch)
+        logger.info(f"Subscribed watch: {watch.name}")
+        if self.prearm:
+            self._spawn(self.scraper.armory.arm(watch))
+        return True
+
+    def unsubscribe(self, watch: Watch) -> None:
+        """
+        Removes a watch from the next sweeps.
+        """
+        if self.registry.remove(watch):
+            self.store.remove(watch)
+            logger.info(f"Unsubscribed watch: {watch.name}")
+            if self.prearm:
+                self._spawn(self.scraper.armory.disarm(watch))
+
+    def restore(self) -> list[Watch]:
+        """
+        Re-registers the watches persisted by a previous run. Dates already past are
+        dropped, and so are the watches left with none. Restored watches are not armed
+        here: the caller arms them (Config.PREARMED_BOOKING) a few at a time.
+        Returns:
+            list[Watch]: The restored watches, oldest first.
+        """
+        today = date.today()
+        restored = []
+        for watch in self.store.all():
+            live_dates = [d for d in watch.dates if datetime.strptime(d, "%d/%m/%Y").date() >= today]
+            if live_dates != watch.dates:
+                # The identity includes the dates, so the stored copy is replaced
+                self.store.remove(watch)
+                if not live_dates:
+                    logger.info(f"Dropping expired watch: {watch.name}")
+                    continue
+                watch.dates = live_dates
+                self.store.add(watch)
+            if self.registry.add(watch):
+                restored.append(watch)
+        logger.info(f"Restored {len(restored)} watch(es): {[w.name for w in restored]}")
+        return restored
+
+    def watch_by_id(self, watch_id: str) -> Watch | None:
+        """
+        Returns the active watch with the given id, if any.
+        """
+        return self.registry.by_id(watch_id)
+
+    def watches_for_chat(self, chat_id: int) -> list[Watch]:
+        """
+        Returns the active watches of a chat.
+        """
+        return self.registry.for_chat(chat_id)
+
+    def unsubscribe_chat(self, chat_id: int) -> list[Watch]:
+        """
+        Removes all watches of a chat and returns them.
+        """
+        removed = self.watches_for_chat(chat_id)
+        for watch in removed:
+            self.unsubscribe(watch)
+        return removed
+
+    def wanted_dates(self) -> set[str]:
+        """
+        Returns the union of the dates watched by any subscriber.
+        """
+        return {d for w in self.watches for d in w.dates}
+
+    async def tick(self, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """
+        Runs one sweep: scrapes every watched date once, detects freed spots and
+        notifies (and books for) every watch subscribed to them.
+        This method is designed to be called by the APScheduler job.
+        """
+        if not self.registry:
+            return
+
+        now = datetime.now()
+        dates = self.scheduler.due_dates(self.watches, now) if self.scheduler else self.wanted_dates()
+        if not dates:
+            return
+
+        readings = await self.scraper.read_availability(dates)
+
+        # Availability that grew, as (previous, current), for the turni whose count differs
+        # from their sibling turno (equal counts usually mean a stale widget)
+        grown: dict[tuple[str, Turno], tuple[int, int]] = {}
+        for date_str, counts in readings.items():
+            day = self.scraper.get_day(date_str)
+            if not day:
+                continue
+            for turno, current_disp in counts.items():
+                # A first reading has nothing to compare with: it is not a release
+                if self.scheduler and day.has_baseline(turno) and day.prev_disp(turno) == 0 and current_disp > 0:
+                    self.scheduler.record_release(date_str, turno, current_disp, now)
+                other_disp = [c for t, c in counts.items() if t != turno][0]
+                if current_disp > day.prev_disp(turno) and current_disp != other_disp:
+                    grown[(date_str, turno)] = (day.prev_disp(turno), current_disp)
+                day.update_disp(turno, current_disp)
+
+        for watch in self.watches:
+            if watch not in self.registry:
+                # Booked or cancelled meanwhile
+                continue
+            # A turno is freed for a watch when it just reached a spot for each person
+            # of the group, so a single person fires on the usual 0 -> n transition
+            needed = len(watch.people)
+            for date_str, turno in [(d, t) for d in watch.dates for t in watch.turni]:
+                prev_disp, current_disp = grown.get((date_str, turno), (0, 0))
+                if prev_disp < needed <= current_disp:
+                    booked = await self._notify_and_book(context, watch, date_str, turno)
+                    if booked:
+                        break
+
+    @staticmethod
+    async def _send(context: ContextTypes.DEFAULT_TYPE, chat_id: int, text: str) -> None:
+        with metrics.timer("telegram_send"):
+            await context.bot.send_message(chat_id, text=text)
+
+    async def _notify_and_book(self, context: ContextTypes.DEFAULT_TYPE, watch: Watch, date_str: str, turno: Turno) -> bool:
+        """
+        Alerts the watch's chat about a freed spot and tries to book it.
+        A successfully booked watch is unsubscribed.
+        Returns:
+            bool: True if the booking succeeded.
+        """
+        persone_richieste = watch.people_names
+        day = self.scraper.get_day(date_str)
+        day_name = day.day_name if day else ""
+
+        messaggio_posto_libero = (
+            f"\n\n🚨 Posto liberato {day_name} {date_str} {turno.value} 🚨\n"
+            f"Prenota: https://www.areamarinaprotettagaiola.it/prenotazione#comp-l4zkd4tv\n\n"
+        )
+        logger.info(messaggio_posto_libero)
+        # The alert goes out while booking, so it does not delay the submit
+        alert = asyncio.create_task(self._send(context, watch.chat_id, messaggio_posto_libero.strip()))
+
+        # Attempt to book the spot
+        try:
+            booking_code = await self.scraper.book_spot(date_str, turno, watch.people, watch)
+        except Exception as book_e:
+            await alert
+            logger.error(f"Error during booking for {persone_richieste}: {book_e}")
+            await self._send(context, watch.chat_id, f"❌ Errore durante la prenotazione per {persone_richieste}: {book_e}")
+            return False
+
+        # Send booking confirmation message
+        booking_status_message = (
+            f"✅ Posto prenotato per {persone_richieste} in data {date_str} "
+            f"({turno.name})."
+        )
+        if booking_code:
+            booking_status_message += f" Codice: {booking_code}"
+            # Save booking details
+            save_booking(persone_richieste, booking_code, date_str, turno.name, [BookedPerson(p.name, p.cf) for p in watch.people])
+        else:
+            booking_status_message += " (Codice non disponibile)."
+
+        await alert
+        await self._send(context, watch.chat_id, booking_status_message)
+
+        # Stop watching after a successful booking
+        self.unsubscribe(watch)
+        logger.info(f"Booking watch for {persone_richieste} completed.")
+        return True
@@ -0,0 +1,200 @@
+# src/gaiola/workers.py
+import asyncio
+import itertools
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+from datetime import date
+
+from src.gaiola.driver_pool import RESTART_RETRY_DELAY
+from src.gaiola.governor import RequestGovernor
+from src.gaiola.lifecycle import DriverLifecycle
+from src.gaiola.models import Day, Turno
+from src.gaiola.probes import AvailabilityProbe, ProbeError
+from src.gaiola.session import BrowserSession
+from src.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Seconds a check may take before its result is given up on
+WORKER_TASK_TIMEOUT = 60
+
+def _worker_main(worker_id: int, config: Config, tasks: mp.Queue, results: mp.Queue) -> None:
+    """
+    Entry point of a scraper worker process.
+    Owns one browser on the booking page, takes (task_id, date) checks from the task
+    queue and publishes (task_id, counts, error) on the result queue. The process exits
+    when its browser dies, after Config.DRIVER_MAX_USES checks or past a DriverLifecycle
+    limit; the supervisor in the bot process then starts a fresh one.
+    """
+    logging.basicConfig(
+        format=f"%(asctime)s - worker-{worker_id} - %(name)s - %(levelname)s - %(message)s", level=logging.INFO
+    )
+    session = BrowserSession(config, f"worker-{worker_id}")
+    lifecycle = DriverLifecycle(config)
+    try:
+        if not session.start():
+            logger.warning("Could not open the booking page at start-up.")
+        for handled in itertools.count(1):
+            task = tasks.get()
+            if task is None:
+                break
+            task_id, date_str = task
+            try:
+                if session.loaded_on != date.today():
+                    session.reload()
+                results.put((task_id, session.read_day_availability(date_str), None))
+            except Exception as e:
+                results.put((task_id, None, f"{type(e).__name__}: {e}"))
+                if not session.is_alive():
+                    logger.error("Browser is not responding, exiting.")
+                    break
+                session.open_bookings_page()
+            if handled >= config.DRIVER_MAX_USES:
+                logger.info(f"Handled {handled} checks, exiting to be recycled.")
+                break
+            reason = lifecycle.recycle_reason(session)
+            if reason:
+                logger.info(f"Reached lifecycle limit ({reason}), exiting to be recycled.")
+                break
+    finally:
+        session.quit()
+
+class WorkerPool:
+    """
+    Runs N scraper worker processes, each owning its own browser, and exchanges
+    check tasks and results with them over multiprocessing queues.
+    A reader thread resolves the awaiting futures and supervises the processes, so a
+    worker can crash or be recycled without taking the bot down.
+    """
+    def __init__(self, config: Config):
+        """
+        Args:
+            config (Config): The application configuration object, also handed to the workers.
+        """
+        self.config = config
+        self.size = config.SCRAPER_WORKERS
+        # Spawn rather than fork: the bot process already runs threads and an event loop
+        self._ctx = mp.get_context("spawn")
+        self.tasks = self._ctx.Queue()
+        self.results = self._ctx.Queue()
+        self.processes: dict[int, mp.Process] = {}
+        self._started_at: dict[int, float] = {}
+        self._pending: dict[int, tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self._lock = threading.Lock()
+        self._task_ids = itertools.count()
+        self._closing = False
+        self._reader = threading.Thread(target=self._reader_loop, name="worker-results", daemon=True)
+
+    def start(self) -> None:
+        """
+        Starts the worker processes and the result reader thread.
+        """
+        logger.info(f"Starting {self.size} scraper worker process(es)...")
+        for worker_id in range(self.size):
+            self._start_worker(worker_id)
+        self._reader.start()
+
+    def _start_worker(self, worker_id: int) -> None:
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.config, self.tasks, self.results),
+            name=f"gaiola-worker-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        self.processes[worker_id] = process
+        self._started_at[worker_id] = time.monotonic()
+
+    def _supervise(self) -> None:
+        """
+        Restarts the workers that exited, at most once per RESTART_RETRY_DELAY each.
+        """
+        for worker_id, process in list(self.processes.items()):
+            if process.is_alive() or self._closing:
+                continue
+            if time.monotonic() - self._started_at[worker_id] < RESTART_RETRY_DELAY:
+                continue
+            logger.warning(f"Worker {worker_id} exited with code {process.exitcode}, restarting it.")
+            process.join(timeout=0)
+            self._start_worker(worker_id)
+
+    def _reader_loop(self) -> None:
+        while not self._closing:
+            try:
+                task_id, counts, error = self.results.get(timeout=1)
+            except queue.Empty:
+                self._supervise()
+                continue
+            with self._lock:
+                entry = self._pending.pop(task_id, None)
+            if entry:
+                loop, future = entry
+                loop.call_soon_threadsafe(self._resolve, future, counts, error)
+            self._supervise()
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, counts: dict[Turno, int] | None, error: str | None) -> None:
+        if future.done():
+            return
+        if error:
+            future.set_exception(ProbeError(f"Worker check failed: {error}"))
+        else:
+            future.set_result(counts)
+
+    async def submit(self, date_str: str) -> dict[Turno, int]:
+        """
+        Sends a check for a date to the workers and awaits its result.
+        Raises:
+            ProbeError: If the check failed or timed out.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        task_id = next(self._task_ids)
+        with self._lock:
+            self._pending[task_id] = (loop, future)
+        self.tasks.put((task_id, date_str))
+        try:
+            return await asyncio.wait_for(future, timeout=WORKER_TASK_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise ProbeError(f"No worker result for {date_str} within {WORKER_TASK_TIMEOUT}s")
+        finally:
+            with self._lock:
+                self._pending.pop(task_id, None)
+
+    def close(self) -> None:
+        """
+        Asks every worker to exit, terminating the ones that do not.
+        """
+        self._closing = True
+        for _ in self.processes:
+            self.tasks.put(None)
+        for process in self.processes.values():
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self.processes.clear()
+
+class WorkerProbe(AvailabilityProbe):
+    """
+    Reads availability through the scraper worker processes.
+    """
+    name = "workers"
+
+    def __init__(self, config: Config, governor: RequestGovernor):
+        self.workers = WorkerPool(config)
+        self.governor = governor
+
+    def start(self) -> None:
+        """
+        Starts the worker processes.
+        """
+        self.workers.start()
+
+    async def read(self, day: Day) -> dict[Turno, int]:
+        return await self.workers.submit(day.date)
+
+    async def close(self) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.workers.close)
@@ -0,0 +1,99 @@
+# src/http_probe_stub.py
+import argparse
+import glob
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {".json": "application/json", ".html": "text/html; charset=utf-8", ".txt": "text/plain; charset=utf-8"}
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server: "HttpProbeStub"
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        key = (query.get("date", [""])[0], query.get("turno", [""])[0])
+        self.server.requests.append({"path": self.path, "cookie": self.headers.get("Cookie", "")})
+        if url.path != "/availability":
+            self.send_error(404)
+            return
+        status, body, content_type = self.server.response_for(*key)
+        encoded = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format, *args) -> None:
+        logger.debug(format % args)
+
+class HttpProbeStub(ThreadingHTTPServer):
+    """
+    Local stand-in for the booking widget's availability endpoint, for testing the
+    http probe without touching the site. GET /availability?date=YYYY-mm-dd&turno=N
+    answers with the recorded response file `<date>_<turno>.<json|html|txt>` of the
+    responses directory; `responses` overrides it with a (status, body) per key.
+    Every request is logged in `requests` with its Cookie header.
+    """
+    daemon_threads = True
+
+    def __init__(self, responses_dir: str, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            responses_dir (str): Directory of the recorded response files.
+            host (str): Address to listen on.
+            port (int): Port to listen on, 0 for any free port.
+        """
+        super().__init__((host, port), _StubHandler)
+        self.responses_dir = responses_dir
+        self.responses: dict[tuple[str, str], tuple[int, str]] = {}
+        self.requests: list[dict] = []
+
+    @property
+    def url_template(self) -> str:
+        """The HTTP_PROBE_URL template pointing at this stub."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/availability?date={{date_iso}}&turno={{turno}}"
+
+    def response_for(self, date_iso: str, turno: str) -> tuple[int, str, str]:
+        """
+        Returns the status, body and content type served for a date and turno.
+        """
+        if (date_iso, turno) in self.responses:
+            status, body = self.responses[(date_iso, turno)]
+            return status, body, CONTENT_TYPES[".txt"]
+        for path in sorted(glob.glob(os.path.join(self.responses_dir, f"{date_iso}_{turno}.*"))):
+            with open(path) as response_file:
+                return 200, response_file.read(), CONTENT_TYPES.get(os.path.splitext(path)[1], CONTENT_TYPES[".txt"])
+        return 404, "", CONTENT_TYPES[".txt"]
+
+    def start(self) -> None:
+        """
+        Serves in a background daemon thread.
+        """
+        threading.Thread(target=self.serve_forever, name="http-probe-stub", daemon=True).start()
+
+def main():
+    """
+    Serves recorded widget responses for the http probe.
+    Usage: python3 ./src/http_probe_stub.py [--port N] [--responses DIR]
+    then run the bot with PROBE_BACKEND=http and HTTP_PROBE_URL set to the printed template.
+    """
+    parser = argparse.ArgumentParser(description="Serve recorded availability responses for the http probe.")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on (default: 8765)")
+    parser.add_argument("--responses", default="tests/fixtures/http_probe", help="directory of the recorded responses")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.DEBUG)
+    stub = HttpProbeStub(args.responses, port=args.port)
+    print(f"HTTP_PROBE_URL={stub.url_template}")
+    stub.serve_forever()
+
+if __name__ == "__main__":
+    main()
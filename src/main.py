@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 from src.utils.config import Config
 from src.gaiola.scraper import GaiolaScraper
 from src.bot.telegram_bot import TelegramBot
+from src.utils.metrics import start_metrics_server
 
 def main():
     """
@@ -29,13 +30,21 @@ def main():
         config = Config.load_from_env()
         logger.info("Configuration loaded successfully.")
 
+        if config.METRICS_PORT:
+            try:
+                start_metrics_server(config.METRICS_HOST, config.METRICS_PORT)
+            except OSError as e:
+                # Metrics are optional: the bot runs without them
+                logger.error(f"Could not serve metrics on {config.METRICS_HOST}:{config.METRICS_PORT}: {e}. Continuing without metrics.")
+
         # Initialize the Gaiola web scraper
         # This will also initialize the Selenium WebDriver and open the booking page
         scraper = GaiolaScraper(config)
         logger.info("GaiolaScraper initialized.")
 
-        # Initialize and run the Telegram bot
+        # Initialize the Telegram bot and bring back the watches of the previous run
         telegram_bot = TelegramBot(config, scraper)
+        telegram_bot.restore_watches()
         logger.info("TelegramBot initialized. Starting polling...")
         telegram_bot.run()
 
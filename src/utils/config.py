@@ -2,7 +2,7 @@
 import os
 import platform
 import logging
-from dataclasses import dataclass
+from dataclasses import MISSING, dataclass, fields
 
 logger = logging.getLogger(__name__)
 
@@ -11,13 +11,113 @@ class Config:
     """
     Configuration class to hold all environment variables and application settings.
     This centralizes configuration and makes it easily accessible throughout the application.
+    The optional settings below hold their defaults; each can be overridden by the environment
+    variable of the same name, read by load_from_env() (see settings_from_env()).
     """
     TELE_TOKEN: str
     MY_ID: str
     EMAIL: str
     TEL: str
     IS_RASPBERRY_PI: bool
-    CHECK_INTERVAL: int = int(os.getenv('CHECK_INTERVAL', "10")) 
+    CHECK_INTERVAL: int = 10 
+    # Derive per-date polling intervals from observed release patterns instead of CHECK_INTERVAL alone
+    ADAPTIVE_POLLING: bool = False
+    # Bounds of the adaptive polling interval, in seconds
+    POLL_MIN_INTERVAL: int = 5
+    POLL_MAX_INTERVAL: int = 300
+    # Maximum number of date reads per hour across all watches when polling adaptively
+    POLL_BUDGET_PER_HOUR: int = 720
+    # SQLite file recording every availability reading
+    AVAILABILITY_DB: str = "availability.db"
+    # SQLite file persisting the active watches, restored at startup
+    WATCHES_DB: str = "watches.db"
+    # Seconds between the restarts of two restored watches, so they do not all load pages at once
+    WATCH_RESTORE_STAGGER: float = 5.0
+    # Number of browser sessions kept open on the booking page
+    DRIVER_POOL_SIZE: int = 1
+    # Leases after which a pooled browser session is replaced with a fresh one
+    DRIVER_MAX_USES: int = 500
+    # Seconds a bot command waits for a pooled session before answering from the cached days
+    DRIVER_LEASE_TIMEOUT: int = 20
+    # Keep an extra warmed session ready to take over polling when a session is handed to a booking
+    DRIVER_HOT_SPARE: bool = False
+    # Lifecycle limits after which a browser session is replaced: age, page loads and browser memory
+    # (the memory limit only applies to a local browser, not to the Selenium grid)
+    DRIVER_MAX_AGE_HOURS: int = 12
+    DRIVER_MAX_NAVIGATIONS: int = 300
+    DRIVER_MAX_RSS_MB: int = 700
+    # Seconds between two checks of the browser sessions against the lifecycle limits
+    DRIVER_CHECK_INTERVAL: int = 60
+    # Keep a browser session per watch with its booking staged, so only the submit is left on a release
+    PREARMED_BOOKING: bool = False
+    # Minutes after which a staged booking is staged again on a fresh page
+    PREARM_REFRESH_MINUTES: int = 15
+    # Municipalità picked in the booking form (exact option text, e.g. "Municipalità 1 - Chiaia, Posillipo, San Ferdinando");
+    # if empty, the first option matching "muni" is taken
+    MUNICIPALITA: str = ""
+    # Address and port of the Prometheus metrics endpoint, disabled unless a port is set (e.g. 9108)
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_PORT: int = 0
+    # Availability probe engine: "selenium" (click through the widget), "http" (replay the widget's
+    # backend request), "observer" (in-page observer script drained once per tick) or "workers"
+    # (separate scraper processes, each with its own browser)
+    PROBE_BACKEND: str = "selenium"
+    # Number of scraper worker processes for the "workers" probe
+    SCRAPER_WORKERS: int = 2
+    # URL template for the http probe, with {date}, {date_iso} and {turno} placeholders;
+    # discovered from the widget's own requests at start-up if empty
+    HTTP_PROBE_URL: str = ""
+    # Requests per minute allowed to each kind of site traffic (poll, refresh, booking, cancel)
+    GOVERNOR_BUDGETS: str = "poll=120,refresh=10,booking=20,cancel=10"
+    # Requests per minute allowed to all site traffic together
+    GOVERNOR_GLOBAL_PER_MINUTE: int = 150
+    # Consecutive failed polls or recoveries after which polling is paused
+    BREAKER_FAILURE_THRESHOLD: int = 5
+    # Seconds polling is paused for, doubled on every consecutive trip up to BREAKER_MAX_COOLDOWN
+    BREAKER_COOLDOWN: int = 60
+    BREAKER_MAX_COOLDOWN: int = 1800
+    # JSON file remembering which selector last found the PRENOTA button
+    SELECTOR_CACHE_FILE: str = "selector_cache.json"
+    # Hours after which the remembered selector is re-validated against the preferred ones
+    SELECTOR_REVALIDATE_HOURS: int = 24
+    # JSON file holding the browser state (cookies, localStorage, URL) of the booking page
+    SESSION_STATE_FILE: str = "session_state.json"
+    # Hours after which the saved browser state is no longer restored
+    SESSION_STATE_MAX_AGE_HOURS: int = 12
+    # Lean browser profile: block heavy resources and bound the content process memory
+    LEAN_PROFILE: bool = False
+    # Resource types blocked by the lean profile: images, stylesheets, fonts, media, trackers
+    LEAN_BLOCK_TYPES: str = "images,fonts,media,trackers"
+    # Domains refused by the lean profile's filtering proxy (with their subdomains)
+    LEAN_BLOCK_DOMAINS: str = (
+        "frog.wix.com,panorama.wixapps.net,google-analytics.com,googletagmanager.com,doubleclick.net,"
+        "fonts.googleapis.com,fonts.gstatic.com,connect.facebook.net,hotjar.com"
+    )
+    # Port of the lean profile's local filtering proxy, 0 to rely on Firefox prefs only
+    LEAN_PROXY_PORT: int = 0
+    # Address the browser reaches the filtering proxy at (the bot's host when using the Selenium grid)
+    LEAN_PROXY_HOST: str = "127.0.0.1"
+
+    @classmethod
+    def settings_from_env(cls) -> dict:
+        """
+        Returns the optional settings set in the environment, converted to their field type.
+        Read at load time rather than at import, so a .env file loaded by the entry point counts.
+        Raises ValueError if a value cannot be converted.
+        """
+        settings = {}
+        for field in fields(cls):
+            value = os.getenv(field.name)
+            if field.default is MISSING or value is None:
+                continue
+            if field.type is bool:
+                settings[field.name] = value.lower() == "true"
+            else:
+                try:
+                    settings[field.name] = field.type(value)
+                except ValueError:
+                    raise ValueError(f"Invalid value for {field.name}: {value!r}") from None
+        return settings
 
     @classmethod
     def load_from_env(cls):
@@ -34,6 +134,11 @@ class Config:
             raise ValueError("Missing one or more essential environment variables: TELE_TOKEN, MY_ID, EMAIL, TEL")
 
         is_rpi = os.getenv('HEADLESS', 'False').lower() == 'true'
+
+        settings = cls.settings_from_env()
+        probe_backend = settings.get("PROBE_BACKEND", cls.PROBE_BACKEND)
+        if probe_backend not in ("selenium", "http", "observer", "workers"):
+            raise ValueError(f"Unknown PROBE_BACKEND: {probe_backend}")
         logger.info(f"Running on Raspberry Pi: {is_rpi}")
 
         return cls(
@@ -41,5 +146,6 @@ class Config:
             MY_ID=my_id,
             EMAIL=email,
             TEL=tel,
-            IS_RASPBERRY_PI=is_rpi
+            IS_RASPBERRY_PI=is_rpi,
+            **settings
         )
@@ -1,8 +1,9 @@
 # src/utils/helpers.py
 import os
-import json
 import logging
 
+from src.data.booking_registry import BookedPerson, Booking, BookingRegistry
+
 logger = logging.getLogger(__name__)
 
 # Ensure the 'bookings' directory exists
@@ -11,78 +12,61 @@ if not os.path.exists(BOOKINGS_DIR):
     os.makedirs(BOOKINGS_DIR)
     logger.info(f"Created directory: {BOOKINGS_DIR}")
 
-def save_to_json(name: str, code: str):
+BOOKINGS_DB = os.path.join(BOOKINGS_DIR, "bookings.db")
+
+_registry: BookingRegistry | None = None
+
+def get_booking_registry() -> BookingRegistry:
+    """
+    Returns the booking registry, opening it on first use.
+    Legacy per-booking JSON files in BOOKINGS_DIR are imported at that point.
     """
-    Saves booking information (name and code) to a JSON file.
+    global _registry
+    if _registry is None:
+        _registry = BookingRegistry(BOOKINGS_DB)
+        _registry.import_json_dir(BOOKINGS_DIR)
+    return _registry
+
+def save_booking(name: str, code: str, date_str: str | None = None, turno: str | None = None,
+                 people: list[BookedPerson] | None = None) -> Booking:
+    """
+    Saves booking information to the booking registry.
     Args:
         name (str): The name associated with the booking.
         code (str): The booking code.
+        date_str (str | None): The booked date (dd/mm/YYYY).
+        turno (str | None): The booked turno name.
+        people (list[BookedPerson] | None): Everyone the booking is for, holder first.
+    Returns:
+        Booking: The saved booking.
     """
-    data = {
-        "name": name,
-        "code": code
-    }
-    filename = f"{name.lower().replace(' ', '_')}_{code}.json"
-    filepath = os.path.join(BOOKINGS_DIR, filename)
-
-    try:
-        with open(filepath, 'w') as json_file:
-            json.dump(data, json_file, indent=4)
-        logger.info(f"Booking saved to {filepath}")
-    except IOError as e:
-        logger.error(f"Error saving booking to JSON file {filepath}: {e}")
+    return get_booking_registry().add(name, code, date_str, turno, people)
 
 def find_code_by_name(name: str) -> str | None:
     """
-    Finds a booking code by a given name from the saved JSON files.
+    Finds the most recent booking code for a given name.
     Args:
-        name (str): The name to search for.
+        name (str): The name to search for (case-insensitive).
     Returns:
         str | None: The booking code if found, otherwise None.
     """
-    filename_prefix = name.lower().replace(' ', '_') + "_"
-    
-    try:
-        for filename in os.listdir(BOOKINGS_DIR):
-            if filename.startswith(filename_prefix) and filename.endswith(".json"):
-                filepath = os.path.join(BOOKINGS_DIR, filename)
-                with open(filepath, 'r') as json_file:
-                    data = json.load(json_file)
-                    if data.get("name").lower() == name.lower(): # Case-insensitive check
-                        return data.get("code")
-        logger.info(f"No booking file found for name: {name}")
-        return None
-    except FileNotFoundError:
-        logger.warning(f"Bookings directory '{BOOKINGS_DIR}' not found.")
-        return None
-    except json.JSONDecodeError as e:
-        logger.error(f"Error decoding JSON from file {filename}: {e}")
-        return None
-    except Exception as e:
-        logger.error(f"An unexpected error occurred while finding code by name: {e}")
+    bookings = get_booking_registry().find_by_name(name)
+    if not bookings:
+        logger.info(f"No booking found for name: {name}")
         return None
+    return bookings[-1].code
 
-def delete_booking_file(name: str, code: str) -> bool:
+def delete_booking_record(code: str) -> bool:
     """
-    Deletes a specific booking JSON file.
+    Deletes a booking from the registry.
     Args:
-        name (str): The name associated with the booking.
         code (str): The booking code.
     Returns:
-        bool: True if the file was successfully deleted, False otherwise.
+        bool: True if the booking was found and deleted, False otherwise.
     """
-    filename = f"{name.lower().replace(' ', '_')}_{code}.json"
-    filepath = os.path.join(BOOKINGS_DIR, filename)
-
-    try:
-        if os.path.exists(filepath):
-            os.remove(filepath)
-            logger.info(f"Deleted booking file: {filepath}")
-            return True
-        else:
-            logger.warning(f"Booking file not found for deletion: {filepath}")
-            return False
-    except OSError as e:
-        logger.error(f"Error deleting booking file {filepath}: {e}")
-        return False
-
+    deleted = get_booking_registry().remove(code)
+    if deleted:
+        logger.info(f"Deleted booking {code} from registry")
+    else:
+        logger.warning(f"Booking {code} not found for deletion")
+    return deleted
@@ -0,0 +1,165 @@
+# src/utils/metrics.py
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the stage latency histogram buckets
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Latest durations kept per stage to compute the percentiles
+RESERVOIR_SIZE = 1000
+# Prefix of every exported metric name
+PREFIX = "gaiola"
+
+class StageStats:
+    """
+    Durations observed for one stage: totals and histogram for Prometheus,
+    latest samples for the percentiles.
+    """
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.samples: deque[float] = deque(maxlen=RESERVOIR_SIZE)
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        for idx, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[idx] += 1
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        """Returns the q-th percentile (0-100) of the latest samples, None if there are none."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+class Metrics:
+    """
+    Process-wide registry of stage timings and event counters. Thread-safe, since
+    stages run on the sessions' executor threads as well as on the event loop.
+    """
+    def __init__(self):
+        self._stages: dict[str, StageStats] = {}
+        self._counters: dict[tuple[str, tuple[tuple[str, str], ...]], int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Records a duration for a stage."""
+        with self._lock:
+            self._stages.setdefault(stage, StageStats()).observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """
+        Times the block as the given stage. A block that raises is timed too,
+        and counted in the errors counter of the stage.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc("errors", stage=stage)
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def timed(self, stage: str):
+        """
+        Decorator timing every call of a (synchronous) function as the given stage.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def inc(self, name: str, amount: int = 1, **labels: str) -> None:
+        """Increments a counter, optionally labelled."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def stage_summary(self) -> dict[str, dict[str, float | None]]:
+        """
+        Returns, per stage, the number of samples and the p50/p95 durations in seconds.
+        """
+        with self._lock:
+            return {
+                stage: {"count": stats.count, "p50": stats.percentile(50), "p95": stats.percentile(95)}
+                for stage, stats in sorted(self._stages.items())
+            }
+
+    def counters(self) -> dict[str, int]:
+        """
+        Returns every counter, keyed by name and labels, e.g. "errors{stage=page_open}".
+        """
+        with self._lock:
+            return {
+                name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else ""): value
+                for (name, labels), value in sorted(self._counters.items())
+            }
+
+    def render_prometheus(self) -> str:
+        """
+        Renders every stage and counter in the Prometheus text exposition format.
+        """
+        lines = [
+            f"# HELP {PREFIX}_stage_seconds Duration of the scraper and bot stages.",
+            f"# TYPE {PREFIX}_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage, stats in sorted(self._stages.items()):
+                for bound, count in zip(BUCKETS, stats.buckets):
+                    lines.append(f'{PREFIX}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'{PREFIX}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {stats.count}')
+                lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{stage}"}} {stats.total:.6f}')
+                lines.append(f'{PREFIX}_stage_seconds_count{{stage="{stage}"}} {stats.count}')
+            names = sorted({name for name, _ in self._counters})
+            for name in names:
+                lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+                for (counter, labels), value in sorted(self._counters.items()):
+                    if counter != name:
+                        continue
+                    label_str = ",".join(f'{k}="{v}"' for k, v in labels)
+                    lines.append(f"{PREFIX}_{name}_total{{{label_str}}} {value}" if labels else f"{PREFIX}_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        # Scrapes every few seconds would flood the log
+        pass
+
+def start_metrics_server(host: str, port: int) -> ThreadingHTTPServer:
+    """
+    Serves the metrics at http://host:port/metrics in a background daemon thread.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Metrics served at http://{host}:{port}/metrics")
+    return server
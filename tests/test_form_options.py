@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip("selenium")
+
+from src.data.people_data import Person
+from src.gaiola.session import best_option, booking_form_fields, option_match_score
+
+MUNICIPALITA = [
+    "Municipalità 1 - Chiaia, Posillipo, San Ferdinando",
+    "Municipalità 2 - Avvocata, Montecalvario, Mercato",
+    "Municipalità 10 - Bagnoli, Fuorigrotta",
+]
+
+def test_option_match_score_ranks_exact_prefix_substring():
+    assert option_match_score(" Napoli ", "NAPOLI") == 3
+    assert option_match_score("Napoli Est", "napoli") == 2
+    assert option_match_score("Casalnuovo di Napoli", "napoli") == 1
+    assert option_match_score("Casalnuovo di Napoli", "napoli", partial=False) == 0
+    assert option_match_score("Roma", "napoli") == 0
+
+def test_best_option_prefers_exact_over_prefix_and_substring():
+    options = ["Casalnuovo di Napoli", "Napoli Est", "NAPOLI"]
+    assert best_option(options, "napoli") == 2
+    assert best_option(options[:2], "napoli") == 1
+    assert best_option(options[:1], "napoli") == 0
+    assert best_option(options[:1], "napoli", partial=False) is None
+    assert best_option([], "napoli") is None
+
+def test_best_option_raises_on_tie():
+    with pytest.raises(ValueError):
+        best_option(MUNICIPALITA[:2], "muni")
+
+def test_best_option_first_on_tie():
+    assert best_option(MUNICIPALITA, "muni", first_on_tie=True) == 0
+    # An exact option still wins over the prefix matches before it
+    assert best_option(MUNICIPALITA, MUNICIPALITA[2].upper(), first_on_tie=True) == 2
+
+def test_booking_form_fields_municipalita():
+    people = [
+        Person(name="A", surname="B", sex="M", bday="1990-01-01", cf="CF1"),
+        Person(name="C", surname="D", sex="F", bday="1991-01-01", cf="CF2"),
+    ]
+    _, select2_fields, _, first_on_tie = booking_form_fields(people, "a@b.it", "123")
+    assert select2_fields["municipalita_2"] == "muni"
+    assert first_on_tie == ["municipalita_1", "municipalita_2"]
+
+    _, select2_fields, _, first_on_tie = booking_form_fields(people, "a@b.it", "123", MUNICIPALITA[0])
+    assert select2_fields["municipalita_1"] == MUNICIPALITA[0]
+    assert first_on_tie == []
+    assert best_option(MUNICIPALITA, select2_fields["municipalita_1"]) == 0
@@ -0,0 +1,121 @@
+import asyncio
+import dataclasses
+import os
+from contextlib import asynccontextmanager
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("selenium")
+
+from src.gaiola.governor import RequestCategory, RequestGovernor
+from src.gaiola.models import Day, Turno
+from src.gaiola.probes import HttpProbe, ProbeError
+from src.http_probe_stub import HttpProbeStub
+from src.utils.config import Config
+
+RESPONSES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "http_probe")
+
+@pytest.fixture
+def stub():
+    server = HttpProbeStub(RESPONSES_DIR)
+    server.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def make_config(stub: HttpProbeStub) -> Config:
+    config = Config(TELE_TOKEN="", MY_ID="", EMAIL="", TEL="", IS_RASPBERRY_PI=False)
+    return dataclasses.replace(config, HTTP_PROBE_URL=stub.url_template)
+
+class FakeSession:
+    def __init__(self, cookies: list[dict]):
+        self.driver = type("Driver", (), {"get_cookies": lambda _: cookies})()
+
+    async def run(self, func, *args):
+        return func(*args)
+
+class FakePool:
+    """Hands out a session whose browser holds the given cookies."""
+    def __init__(self, cookies: list[dict]):
+        self.session = FakeSession(cookies)
+        self.sessions_created = 1
+
+    @asynccontextmanager
+    async def lease(self, timeout=None):
+        yield self.session
+
+def read_many(probe: HttpProbe, dates: list[str]) -> dict:
+    async def run():
+        try:
+            return await probe.read_many([Day(d, idx, "") for idx, d in enumerate(dates)])
+        finally:
+            await probe.close()
+    return asyncio.run(run())
+
+def test_reads_recorded_responses(stub):
+    config = make_config(stub)
+    probe = HttpProbe(config, "test-agent", RequestGovernor(config))
+    readings = read_many(probe, ["01/08/2030", "02/08/2030"])
+    assert readings == {
+        "01/08/2030": {Turno.MATTINO: 3, Turno.POMERIGGIO: 0},
+        "02/08/2030": {Turno.MATTINO: 5, Turno.POMERIGGIO: 12},
+    }
+    assert {r["path"] for r in stub.requests} == {
+        "/availability?date=2030-08-01&turno=1", "/availability?date=2030-08-01&turno=2",
+        "/availability?date=2030-08-02&turno=1", "/availability?date=2030-08-02&turno=2",
+    }
+
+def test_takes_one_poll_token_per_request(stub):
+    config = make_config(stub)
+    governor = RequestGovernor(config)
+    read_many(HttpProbe(config, "test-agent", governor), ["01/08/2030"])
+    assert governor.granted[RequestCategory.POLL] == len(stub.requests) == 2
+
+def test_missing_response_skips_the_date(stub):
+    config = make_config(stub)
+    probe = HttpProbe(config, "test-agent", RequestGovernor(config))
+    assert read_many(probe, ["03/08/2030"]) == {}
+
+def test_forbidden_resyncs_cookies_and_retries(stub):
+    config = make_config(stub)
+    governor = RequestGovernor(config)
+    pool = FakePool([{"name": "PHPSESSID", "value": "fresh", "domain": "127.0.0.1"}])
+    probe = HttpProbe(config, "test-agent", governor, pool)
+    # The first request for the morning is refused, the retry is answered from the recording
+    refused = []
+    serve = stub.response_for
+
+    def refuse_once(date_iso, turno):
+        if (date_iso, turno) == ("2030-08-01", "1") and not refused:
+            refused.append(turno)
+            return 403, "", "text/plain"
+        return serve(date_iso, turno)
+
+    stub.response_for = refuse_once
+
+    async def read():
+        try:
+            return await probe.read(Day("01/08/2030", 0, ""))
+        finally:
+            await probe.close()
+
+    assert asyncio.run(read()) == {Turno.MATTINO: 3, Turno.POMERIGGIO: 0}
+    retried = [r for r in stub.requests if r["path"].endswith("turno=1")]
+    assert len(retried) == 2
+    assert "PHPSESSID=fresh" in retried[-1]["cookie"]
+    assert governor.granted[RequestCategory.POLL] == 1 # The retry; read() itself is not governed
+
+def test_parse_availability_formats():
+    assert HttpProbe.parse_availability('{"posti": 4}') == 4
+    assert HttpProbe.parse_availability("7") == 7
+    assert HttpProbe.parse_availability("<b>Posti disponibili: 2</b>") == 2
+    with pytest.raises(ProbeError):
+        HttpProbe.parse_availability("<html>maintenance</html>")
+
+def test_template_from_request():
+    url = "https://booking.example/widget.php?action=disp&data=01%2F08%2F2030&id_turno=2&r={x}"
+    template = HttpProbe.template_from_request(url, "01/08/2030", Turno.POMERIGGIO)
+    assert template == "https://booking.example/widget.php?action=disp&data={date}&id_turno={turno}&r={{x}}"
+    assert template.format(date="02/08/2030", date_iso="2030-08-02", turno=1).endswith("data=02/08/2030&id_turno=1&r={x}")
+    assert HttpProbe.template_from_request("https://booking.example/static.js", "01/08/2030", Turno.MATTINO) is None